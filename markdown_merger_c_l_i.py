@@ -5,128 +5,996 @@ MD-Merger - Ein CLI-Tool zum Zusammenfügen von Markdown-Dateien
 
 import os
 import argparse
+import codecs
+import contextlib
+import hashlib
+import json
+import signal
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, Dict, List, Union
 
-def collect_md_files_from_directory(directory: str) -> List[str]:
+from merger_config import MergerConfig
+from merger_dedup import DEDUP_MODES, DEFAULT_DEDUP_WORKERS, find_duplicates, reference_line
+from merger_discovery import (
+    DEFAULT_SCAN_WORKERS,
+    ExcludeMatcher,
+    FileRecord,
+    FileSet,
+    ScanStats,
+    discover_markdown_files,
+    scan_markdown_tree,
+    split_oversized,
+    stat_input_files,
+    unique_physical_files,
+)
+from merger_engine import (
+    SMALL_FILE_SIZE,
+    PositionalAbort,
+    ReadAhead,
+    copy_passthrough,
+    kernel_copy,
+    merge_positional,
+    read_plain,
+)
+from merger_index import SegmentIndex, default_index_file, tail_checksum
+from merger_output import (
+    DEFAULT_WRITE_BUFFER,
+    FSYNC_POLICIES,
+    STDOUT_PATH,
+    AppendOutput,
+    AtomicOutput,
+    StreamOutput,
+    compression_for,
+    open_compressed,
+)
+from merger_shards import parse_size, plan_shards, shard_manifest_file, shard_path, write_shard_manifest
+from merger_template import (
+    DEFAULT_BETWEEN_FILES,
+    DEFAULT_HEADER_FORMAT,
+    HeaderTemplate,
+    file_record,
+    separator_bytes,
+)
+from merger_timestamps import DOCUMENT_TIMESTAMP_SIZE, FILE_TIMESTAMP_SIZE, TIMESTAMP_MODES, Timestamps, timestamp_mode
+from merger_toc import DEFAULT_TOC_WORKERS, collect_headings, render_toc
+from merger_transform import LineTransform, TransformOptions
+
+# Umgang mit Dateien über filters.max_file_size_mb
+OVERSIZE_POLICIES = ('skip', 'truncate', 'stream')
+
+# Blockgröße beim stückweisen Kopieren großer Dateien (in Zeichen)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Trenner zwischen zwei Dateien (Standard von separators.between_files)
+SEPARATOR = separator_bytes(DEFAULT_BETWEEN_FILES)
+
+# Standard-Budget für vorgelesene, noch nicht geschriebene Dateien
+READ_AHEAD_BYTES = 64 * 1024 * 1024
+
+# Mindestabstand zwischen zwei Fortschrittsmeldungen in Sekunden
+PROGRESS_INTERVAL = 1.0
+
+# Die Größe des Inhaltsverzeichnisses einer Teildatei steht erst nach dem Aufteilen fest
+TOC_SIZE_LIMIT_ERROR = "output.add_toc ist mit --max-output-size nicht möglich (--max-files-per-output schon)."
+
+class MergeStats:
+    """Statistiken eines Merge-Laufs, gefüllt von merge_markdown_files."""
+    
+    def __init__(self):
+        self.files_merged = 0
+        self.files_skipped = 0
+        self.bytes_written = 0
+        self.oversized: List[FileRecord] = []
+        self.files_truncated = 0
+        self.files_streamed = 0
+        self.files_zero_copy = 0
+        self.files_reused = 0
+        self.files_deduplicated = 0
+        self.toc_entries = 0
+        self.append_only = False
+        self.bytes_compressed = 0
+        self.read_ahead_peak_depth = 0
+        self.read_ahead_mean_depth = 0.0
+        self.read_ahead_peak_bytes = 0
+        self.writer_blocked_seconds = 0.0
+        self.shards: List[str] = []
+    
+    def add(self, other: 'MergeStats'):
+        """Addiert die Statistiken eines weiteren Laufs (z. B. einer Teildatei)."""
+        self.files_merged += other.files_merged
+        self.files_skipped += other.files_skipped
+        self.bytes_written += other.bytes_written
+        self.oversized.extend(other.oversized)
+        self.files_truncated += other.files_truncated
+        self.files_streamed += other.files_streamed
+        self.files_zero_copy += other.files_zero_copy
+        self.files_reused += other.files_reused
+        self.files_deduplicated += other.files_deduplicated
+        self.toc_entries += other.toc_entries
+        self.bytes_compressed += other.bytes_compressed
+        self.read_ahead_peak_depth = max(self.read_ahead_peak_depth, other.read_ahead_peak_depth)
+        self.read_ahead_mean_depth = max(self.read_ahead_mean_depth, other.read_ahead_mean_depth)
+        self.read_ahead_peak_bytes = max(self.read_ahead_peak_bytes, other.read_ahead_peak_bytes)
+        self.writer_blocked_seconds += other.writer_blocked_seconds
+
+class ProgressReporter:
+    """
+    Meldet den Fortschritt höchstens alle interval Sekunden.
+    
+    Bei Hunderttausenden kleiner Dateien kostet eine Zeile pro Datei mehr
+    als das Zusammenfügen selbst; gemeldet werden daher nur die erste Datei
+    und danach die jeweils aktuelle, sobald das Intervall abgelaufen ist.
+    """
+    
+    def __init__(self, total: int, interval: float = PROGRESS_INTERVAL):
+        """
+        Args:
+            total: Anzahl der Dateien insgesamt
+            interval: Mindestabstand in Sekunden (0 = jede Datei melden)
+        """
+        self.total = total
+        self.interval = interval
+        self._next_report = 0.0
+    
+    def update(self, number: int, filepath: str):
+        """Meldet, dass Datei number (ab 1) gerade verarbeitet wird."""
+        if self.interval <= 0:
+            print(f"Verarbeite: {filepath}")
+            return
+        
+        now = time.monotonic()
+        if now >= self._next_report:
+            print(f"Verarbeite: [{number}/{self.total}] {filepath}")
+            self._next_report = now + self.interval
+
+def collect_md_files_from_directory(directory: str, workers: int = DEFAULT_SCAN_WORKERS,
+                                    exclude: ExcludeMatcher = None) -> List[str]:
     """
     Sammelt rekursiv alle .md Dateien aus einem Verzeichnis.
     
     Args:
         directory: Pfad zum Verzeichnis
+        workers: Anzahl paralleler Threads zum Listen der Verzeichnisse
+        exclude: Optionale Ausschlussmuster (filters.exclude_patterns)
         
     Returns:
         Liste der Markdown-Dateipfade, sortiert nach ASCII-Codes
     """
-    md_files = []
-    
-    for root, dirs, files in os.walk(directory):
-        # Sortiere Verzeichnisse nach ASCII-Codes
-        dirs.sort()
-        
-        for file in sorted(files):  # Sortiere Dateien nach ASCII-Codes
-            if file.lower().endswith('.md'):
-                full_path = os.path.join(root, file)
-                md_files.append(full_path)
-    
-    return md_files
+    return scan_markdown_tree(directory, workers=workers, exclude=exclude)
 
-def read_markdown_file(filepath: str) -> str:
+def read_markdown_file(filepath: str, max_bytes: int = None, newline: str = None) -> str:
     """
     Liest eine Markdown-Datei und gibt den Inhalt zurück.
     
     Args:
         filepath: Pfad zur Markdown-Datei
+        max_bytes: Höchstens so viele Bytes lesen und am letzten Zeilenumbruch
+            davor abschneiden (None = ganze Datei)
+        newline: Wie bei open(): None vereinheitlicht die Zeilenenden,
+            '' lässt sie unverändert
         
     Returns:
-        Inhalt der Datei als String
+        Inhalt der Datei als String ("" auch bei nicht lesbaren Dateien)
     """
+    content = _read_markdown(filepath, max_bytes, newline)
+    return content if content is not None else ""
+
+def _read_markdown(filepath: str, max_bytes: int = None, newline: str = None) -> Union[str, None]:
+    """Wie read_markdown_file, aber None statt "" bei nicht lesbaren Dateien."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:
+        if max_bytes is not None:
+            return _read_truncated(filepath, max_bytes, normalize=newline is None)
+        
+        with open(filepath, 'r', encoding='utf-8', newline=newline) as file:
             content = file.read()
             return content
     except FileNotFoundError:
         print(f"Fehler: Datei '{filepath}' nicht gefunden.", file=sys.stderr)
-        return ""
+        return None
     except UnicodeDecodeError:
         print(f"Fehler: Datei '{filepath}' konnte nicht als UTF-8 gelesen werden.", file=sys.stderr)
-        return ""
+        return None
     except Exception as e:
         print(f"Fehler beim Lesen der Datei '{filepath}': {e}", file=sys.stderr)
-        return ""
+        return None
+
+def _read_truncated(filepath: str, max_bytes: int, normalize: bool = True) -> str:
+    """Liest höchstens max_bytes und schneidet an einer Zeilengrenze ab."""
+    with open(filepath, 'rb') as file:
+        data = file.read(max_bytes)
+    
+    cut = data.rfind(b'\n') + 1
+    if cut:
+        content = data[:cut].decode('utf-8')
+    else:
+        # Keine Zeile passt ganz hinein: ein angeschnittenes UTF-8-Zeichen am Ende fällt weg
+        content = codecs.getincrementaldecoder('utf-8')().decode(data)
+    
+    if not normalize:
+        return content
+    # Zeilenenden wie beim Lesen im Textmodus vereinheitlichen
+    return content.replace('\r\n', '\n').replace('\r', '\n')
+
+def stream_markdown_file(filepath: str, output, header: bytes = b'',
+                         chunk_size: int = STREAM_CHUNK_SIZE, digest=None,
+                         transform: LineTransform = None) -> Union[str, None]:
+    """
+    Kopiert eine Markdown-Datei stückweise in den Ausgabestrom.
+    
+    Der Header wird erst geschrieben, wenn der erste Block gelesen ist, sodass
+    leere und nicht lesbare Dateien keine Spuren hinterlassen. Nur bei Dateien,
+    die größer als ein Block sind, wird die Startposition gemerkt, um bei einem
+    späteren Lesefehler das bereits Geschriebene wieder zu entfernen. Lässt
+    sich die Ausgabe nicht zurücksetzen (Kompression), wird die Datei vorher
+    einmal vollständig geprüft.
+    
+    Args:
+        filepath: Pfad zur Markdown-Datei
+        output: Geöffneter, durchsuchbarer binärer Ausgabestrom (UTF-8)
+        header: Bytes, die vor dem Inhalt geschrieben werden
+        chunk_size: Anzahl der Zeichen pro Lesevorgang
+        digest: Optionales hashlib-Objekt, das mit dem geschriebenen Inhalt aktualisiert wird
+        transform: Optionale Umwandlung, die jeder Block auf dem Weg durchläuft
+        
+    Returns:
+        Letztes geschriebenes Zeichen ('' bei leerer Datei, '\n', wenn die
+        Umwandlung den ganzen Inhalt entfernt hat), None bei Fehler
+    """
+    segment_start = None
+    newline = transform.options.newline if transform else None
+    try:
+        with open(filepath, 'r', encoding='utf-8', newline=newline) as file:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return ''
+            
+            if len(chunk) == chunk_size:
+                if output.seekable():
+                    segment_start = output.tell()
+                else:
+                    # Nicht zurücksetzbare Ausgabe: erst die ganze Datei prüfen, dann schreiben
+                    while file.read(chunk_size):
+                        pass
+                    file.seek(0)
+                    chunk = file.read(chunk_size)
+            
+            output.write(header)
+            if transform is not None:
+                transform.begin()
+            last_char = '\n'
+            while chunk:
+                if transform is not None:
+                    chunk = transform.feed(chunk)
+                if chunk:
+                    data = chunk.encode('utf-8')
+                    output.write(data)
+                    if digest is not None:
+                        digest.update(data)
+                    last_char = chunk[-1]
+                chunk = file.read(chunk_size)
+            
+            if transform is not None:
+                rest = transform.end()
+                if rest:
+                    data = rest.encode('utf-8')
+                    output.write(data)
+                    if digest is not None:
+                        digest.update(data)
+                    last_char = rest[-1]
+            return last_char
+    except FileNotFoundError:
+        print(f"Fehler: Datei '{filepath}' nicht gefunden.", file=sys.stderr)
+    except UnicodeDecodeError:
+        print(f"Fehler: Datei '{filepath}' konnte nicht als UTF-8 gelesen werden.", file=sys.stderr)
+    except BrokenPipeError:
+        # Fehler beim Schreiben, nicht beim Lesen: der Empfänger ist weg
+        raise
+    except OSError as e:
+        print(f"Fehler beim Lesen der Datei '{filepath}': {e}", file=sys.stderr)
+    
+    if segment_start is not None:
+        output.seek(segment_start)
+        output.truncate()
+    return None
+
+def _merge_positional(files: List[Union[str, FileRecord]], output, add_separators: bool,
+                      stats: MergeStats, max_file_size: int, oversize_policy: str,
+                      workers: int, verify_utf8: bool, progress: ProgressReporter,
+                      file_header: Callable[[Union[str, FileRecord], str, int], bytes],
+                      separator: bytes) -> bool:
+    """
+    Versucht, alle Dateien parallel an vorausberechnete Positionen zu schreiben.
+    
+    Returns:
+        True bei Erfolg; False, wenn seriell geschrieben werden muss (die
+        Ausgabe ist dann wieder leer)
+    """
+    entries = []
+    oversized = []
+    for i, entry in enumerate(files):
+        if not isinstance(entry, FileRecord):
+            return False
+        
+        if max_file_size is not None and entry.size > max_file_size:
+            if oversize_policy == 'truncate':
+                return False
+            if oversize_policy == 'skip':
+                oversized.append(entry)
+                continue
+        
+        entries.append((entry, file_header(entry, entry.path, i + 1), add_separators and i < len(files) - 1))
+    
+    for number, (entry, _, _) in enumerate(entries, 1):
+        progress.update(number, entry.path)
+    
+    try:
+        segments = merge_positional(entries, output.fileno(), separator, workers, verify_utf8)
+    except PositionalAbort as e:
+        print(f"Hinweis: Paralleles Schreiben nicht möglich ({e}), schreibe seriell.", file=sys.stderr)
+        os.ftruncate(output.fileno(), 0)
+        return False
+    
+    stats.oversized.extend(oversized)
+    stats.files_merged = len(segments)
+    stats.files_skipped = len(entries) - len(segments)
+    if segments:
+        last = segments[-1]
+        stats.bytes_written = last.offset + len(last.header) + last.size + len(last.tail)
+    return True
 
-def merge_markdown_files(files: List[str], output_file: str, add_separators: bool = True) -> bool:
+def merge_markdown_files(files: Union[FileSet, List[Union[str, FileRecord]]], output_file: str,
+                         add_separators: bool = True, stats: MergeStats = None,
+                         max_file_size: int = None, oversize_policy: str = 'skip',
+                         buffer_size: int = STREAM_CHUNK_SIZE, zero_copy: bool = True,
+                         verify_utf8: bool = True, read_ahead: int = 0,
+                         read_ahead_bytes: int = READ_AHEAD_BYTES, parallel_writers: int = 0,
+                         write_buffer_size: int = DEFAULT_WRITE_BUFFER, fsync_policy: str = 'none',
+                         index_file: str = None, compression: str = None,
+                         compression_level: int = None, compression_workers: int = 0,
+                         progress_interval: float = PROGRESS_INTERVAL,
+                         duplicates: Dict[str, str] = None,
+                         transform: TransformOptions = None, add_toc: bool = False,
+                         toc_workers: int = DEFAULT_TOC_WORKERS, timestamps: str = 'off',
+                         header_template: HeaderTemplate = None, separator: bytes = SEPARATOR,
+                         append_in_place: bool = False) -> bool:
     """
     Fügt mehrere Markdown-Dateien zu einer zusammen.
     
     Args:
-        files: Liste der Eingabedateien
-        output_file: Pfad zur Ausgabedatei
+        files: Eingabedateien: FileSet aus der Suche, oder eine Liste von Pfaden
+            bzw. FileRecords; Pfade werden erst beim Zugriff zusammengesetzt
+        output_file: Pfad zur Ausgabedatei, oder '-' für die Standardausgabe
+            (ohne atomares Ersetzen, parallele Schreiber und Segment-Index)
         add_separators: Ob Trennlinien zwischen Dateien hinzugefügt werden sollen
+        stats: Optionales Objekt, in das Statistiken des Laufs geschrieben werden
+        max_file_size: Größenlimit in Bytes, geprüft anhand der Größe im FileRecord
+        oversize_policy: Umgang mit zu großen Dateien: 'skip' (nicht lesen),
+            'truncate' (an einer Zeilengrenze abschneiden) oder 'stream'
+            (unverändert stückweise kopieren)
+        buffer_size: Blockgröße beim stückweisen Kopieren; bestimmt zusammen mit
+            dem Ausgabepuffer den Speicherbedarf, unabhängig von der Dateigröße
+        zero_copy: Dateiinhalte ohne Umwandlung kernelseitig kopieren
+            (copy_file_range, sendfile), sofern keine Umwandlung nötig ist
+        verify_utf8: Beim Kernel-Kopieren vorher auf gültiges UTF-8 ohne
+            Wagenrücklauf prüfen; ohne Prüfung werden die Bytes unverändert übernommen
+        read_ahead: Anzahl der Dateien, die ein Thread-Pool vorab liest und
+            dekodiert, während in sortierter Reihenfolge geschrieben wird (0 = aus)
+        read_ahead_bytes: Byte-Budget für vorgelesene, noch nicht geschriebene Dateien
+        parallel_writers: Anzahl der Threads, die Dateien parallel an aus den
+            stat-Größen vorausberechnete Positionen schreiben (0 = aus); fällt
+            auf serielles Schreiben zurück, wenn eine Datei umgewandelt werden muss
+        write_buffer_size: Größe des Schreibpuffers der Ausgabedatei in Bytes
+        fsync_policy: 'none', 'file' oder 'file+dir'; die Ausgabe wird in eine
+            temporäre Datei geschrieben und erst am Ende atomar ersetzt (außer
+            bei append_in_place)
+        index_file: Pfad eines Segment-Index; passt er zur vorhandenen Ausgabe,
+            werden Abschnitte unveränderter Dateien kernelseitig aus der alten
+            Ausgabe übernommen. Danach wird er für die neue Ausgabe geschrieben.
+            Schließt parallel_writers aus.
+        compression: 'gzip', 'bz2' oder 'xz', um die Ausgabe beim Schreiben zu
+            komprimieren (None = unkomprimiert); schließt Kernel-Kopien,
+            parallele Schreiber und den Segment-Index aus
+        compression_level: Kompressionsstufe (None = Standard des Verfahrens)
+        compression_workers: Threads für gzip in unabhängigen Blöcken (0 = ein Strom)
+        progress_interval: Mindestabstand der Fortschrittsmeldungen in Sekunden
+            (0 = jede Datei melden)
+        duplicates: Zuordnung Duplikat → erstes Vorkommen (aus find_duplicates);
+            Duplikate werden ohne Inhalt, nur mit einem Verweis auf das erste
+            Vorkommen geschrieben. Schließt parallel_writers aus.
+        transform: Einstellungen aus processing.* und output.line_ending; sind
+            Umwandlungen aktiv, läuft jede Datei einmal durch die vereinigte
+            Zeilen-Umwandlung (ohne Kernel-Kopien und parallele Schreiber)
+        add_toc: Ein Inhaltsverzeichnis voranstellen; die Überschriften werden
+            vorab von toc_workers Threads gesammelt, ohne die Ausgabe zu puffern.
+            Schließt parallel_writers und das Anhängen an eine alte Ausgabe aus.
+        toc_workers: Threads für das Sammeln der Überschriften
+        timestamps: Einer der TIMESTAMP_MODES; 'file' ergänzt den Header jeder
+            Datei um ihre Änderungszeit, 'document' stellt dem Dokument die der
+            jüngsten Datei voran. Die Zeiten stammen aus den FileRecords der
+            Suche. 'document' schließt parallel_writers und das Anhängen aus.
+        header_template: Vorlage aus separators.header_format (Standard:
+            '<!-- Quelle: {filepath} -->'); hängt sie von der Position ab
+            (Feld index), werden keine Abschnitte aus der alten Ausgabe übernommen
+        separator: Kodierter Trenner aus separators.between_files (siehe separator_bytes)
+        append_in_place: Mit index_file: sind die alten Dateien unverändert die
+            ersten der neuen Liste, nur die neuen Dateien direkt an die bestehende
+            Ausgabe anhängen statt sie neu zu schreiben. Ein gleichzeitiger Leser
+            kann dann eine halb verlängerte Ausgabe sehen; bei einem Fehler wird
+            sie auf ihre alte Länge zurückgeschnitten.
         
     Returns:
         True bei Erfolg, False bei Fehler
     """
+    if stats is None:
+        stats = MergeStats()
+    references = duplicates is not None
+    if duplicates is None:
+        duplicates = {}
+    elif duplicates:
+        # Verweise haben keine vorausberechenbare Position
+        parallel_writers = 0
+    
+    to_stdout = output_file == STDOUT_PATH
+    if to_stdout:
+        if index_file:
+            print("Fehler: Der Segment-Index ist bei Ausgabe auf stdout nicht möglich.", file=sys.stderr)
+            return False
+        parallel_writers = 0
+    
+    if compression:
+        if index_file:
+            print("Fehler: Der Segment-Index ist mit komprimierter Ausgabe nicht möglich.", file=sys.stderr)
+            return False
+        # Komprimiert wird ein reiner Strom: keine Kernel-Kopien, keine festen Positionen
+        zero_copy = False
+        parallel_writers = 0
+    
+    if header_template is None:
+        header_template = HeaderTemplate(DEFAULT_HEADER_FORMAT)
+    if not separator:
+        add_separators = False
+    
+    line_transform = None
+    newline = b'\n'
+    if transform is not None and not transform.identity:
+        # Umgewandelte Inhalte: keine Kernel-Kopien, keine vorausberechneten Positionen
+        line_transform = LineTransform(transform)
+        newline = line_transform.line_ending
+        separator = separator.replace(b'\n', newline)
+        zero_copy = False
+        parallel_writers = 0
+    keep_empty = line_transform is not None and not transform.skip_empty_files
+    if add_toc:
+        # Das Inhaltsverzeichnis verschiebt alle Positionen
+        parallel_writers = 0
+    stamps = Timestamps(timestamps) if timestamps != 'off' else None
+    document_stamp = stamps is not None and stamps.per_document
+    if document_stamp:
+        # Wie das Inhaltsverzeichnis: verschiebt alle Positionen und ändert sich mit neuen Dateien
+        parallel_writers = 0
+    # Unverändert übernommene Zeilenenden können auch auf '\r' enden
+    line_breaks = ('\n', '\r') if line_transform is not None else ('\n',)
+    read_newline = transform.newline if line_transform is not None else None
+    
+    previous_index = new_index = None
+    if index_file:
+        # Alles, was den Inhalt eines Abschnitts bestimmt
+        index_options = {
+            'header': header_template.format,
+            'relpath_base': header_template.base_dir if 'relpath' in header_template.fields else None,
+            'separator': separator.decode('utf-8'),
+            'max_file_size': max_file_size,
+            'oversize_policy': oversize_policy,
+            'raw_bytes': zero_copy and not verify_utf8,
+            'references': references,
+            'transform': line_transform.options._asdict() if line_transform else None,
+            'toc': add_toc,
+            # Lokale Zeit: mit der Zeitzone ändern sich alle Zeitstempel
+            'timestamps': [timestamps, *time.tzname] if stamps else None,
+        }
+        if not (line_transform and transform.remove_duplicate_headers) and not header_template.positional:
+            # Sonst hängt jeder Abschnitt von allen vorherigen Dateien ab
+            previous_index = SegmentIndex.load(index_file, output_file, index_options)
+        new_index = SegmentIndex(index_options, add_separators)
+    
+    if stamps is not None and stamps.per_file:
+        render_header = header_template.render
+        file_stamp = stamps.file_line
+        
+        def file_header(entry, filepath: str, number: int) -> bytes:
+            # Zeitstempel zwischen Header-Zeile und Leerzeile
+            return render_header(entry, filepath, number) + file_stamp(file_record(entry).mtime_ns) + b'\n'
+    else:
+        # Header samt Leerzeile in einem Aufruf, ohne Header gar nichts
+        file_header = header_template.block
+    
+    def is_oversized(entry) -> bool:
+        return (max_file_size is not None and isinstance(entry, FileRecord)
+                and entry.size > max_file_size)
+    
+    def reusable(entry) -> Union[dict, None]:
+        if previous_output is None or not isinstance(entry, FileRecord):
+            return None
+        reused = previous_index.lookup(entry)
+        # Ein alter Verweis passt nur, wenn die Datei noch Duplikat derselben Datei ist
+        if reused is not None and reused.get('reference') != duplicates.get(entry.path):
+            return None
+        return reused
+    
+    # Kleine Schreibvorgänge (Header, Inhalt kleiner Dateien, Zeilenumbruch,
+    # Trenner) werden gesammelt und als ein Block geschrieben
+    batch: List[bytes] = []
+    batch_size = 0
+    
+    def put(data: bytes):
+        nonlocal batch_size
+        batch.append(data)
+        batch_size += len(data)
+        if batch_size >= write_buffer_size:
+            drain()
+    
+    def drain():
+        # Vor jedem Schreiben am Block vorbei (Kernel-Kopie, stückweises Kopieren)
+        nonlocal batch_size
+        if batch:
+            output.write(b''.join(batch))
+            batch.clear()
+            batch_size = 0
+    
+    def position() -> int:
+        return output.tell() + batch_size
+    
+    # Nicht geschriebene Dateien; auf sie kann kein Duplikat verweisen
+    omitted = set()
+    
+    def skip_file(entry):
+        # Leere und nicht lesbare Dateien; im Index vermerkt, damit sie die Reihenfolge nicht unterbrechen
+        stats.files_skipped += 1
+        if duplicates:
+            omitted.add(entry.path if isinstance(entry, FileRecord) else entry)
+        if new_index is not None and isinstance(entry, FileRecord):
+            new_index.add(entry, None, position(), 0, skipped=True)
+    
+    def prefetch_size(entry) -> Union[int, None]:
+        # Nur Dateien mit bekannter Größe und ohne stückweises Kopieren vorlesen
+        if (not isinstance(entry, FileRecord) or entry.path in duplicates
+                or reusable(entry) is not None):
+            return None
+        if is_oversized(entry):
+            return max_file_size if oversize_policy == 'truncate' else None
+        return entry.size
+    
+    def prefetch(entry) -> Union[bytes, str, None]:
+        max_bytes = max_file_size if is_oversized(entry) else None
+        content = _read_markdown(entry.path, max_bytes=max_bytes, newline=read_newline)
+        # Die Umwandlung hängt von den vorherigen Dateien ab und läuft erst beim Schreiben;
+        # None (nicht lesbar) bleibt von leer unterscheidbar
+        return content if line_transform is not None or content is None else content.encode('utf-8')
+    
+    if read_ahead > 0:
+        read_ahead_context = ReadAhead(files, prefetch, prefetch_size, read_ahead, read_ahead_bytes)
+    else:
+        read_ahead_context = contextlib.nullcontext()
+    
+    previous_output = previous_index.open_output(output_file) if previous_index else None
+    # Mit Inhaltsverzeichnis oder Dokument-Zeitstempel ändert sich auch der Anfang der Ausgabe,
+    # Anhängen genügt nie
+    first = (previous_index.append_point(files, add_separators)
+             if previous_output and append_in_place and not add_toc and not document_stamp else None)
+    
+    toc = None
+    if add_toc:
+        def toc_jobs():
+            for entry in files:
+                filepath = entry.path if isinstance(entry, FileRecord) else entry
+                if is_oversized(entry):
+                    if oversize_policy == 'skip':
+                        continue
+                    if oversize_policy == 'truncate':
+                        yield filepath, max_file_size
+                        continue
+                if filepath not in duplicates:
+                    yield filepath, None
+        
+        # Speicherbedarf proportional zur Anzahl der Überschriften, nicht zur Ausgabegröße
+        toc_text, stats.toc_entries = render_toc(
+            collect_headings(toc_jobs(), read_newline, toc_workers),
+            remove_duplicates=line_transform is not None and transform.remove_duplicate_headers,
+            verify=line_transform is not None and transform.verify_duplicate_headers)
+        if stats.toc_entries:
+            toc = toc_text.encode('utf-8')
+            if line_transform is not None:
+                toc = toc.replace(b'\n', newline)
+    
     try:
-        with open(output_file, 'w', encoding='utf-8') as output:
-            for i, filepath in enumerate(files):
-                print(f"Verarbeite: {filepath}")
+        if first is not None:
+            # Nur neue Dateien am Ende: die alte Ausgabe bleibt stehen und wird verlängert
+            output_context = AppendOutput(output_file, previous_index.output_size,
+                                          write_buffer_size, fsync_policy)
+            # Behält den früheren Beginn: für die neuen Dateien nur strenger, nie zu großzügig
+            new_index = previous_index
+            stats.append_only = True
+            stats.files_merged = stats.files_reused = previous_index.written_count()
+            stats.files_skipped = first - stats.files_merged
+        elif to_stdout:
+            # Pipe: nichts zu ersetzen, Abbruch des Empfängers endet in BrokenPipeError
+            output_context = StreamOutput(write_buffer_size)
+            first = 0
+        else:
+            # Leser sehen nie eine halb geschriebene Ausgabe; bei Fehlern bleibt die alte erhalten
+            output_context = AtomicOutput(output_file, write_buffer_size, fsync_policy)
+            first = 0
+        
+        with output_context as target, read_ahead_context as reader, \
+                previous_output or contextlib.nullcontext(), \
+                (open_compressed(target, compression, compression_level, compression_workers)
+                 if compression else contextlib.nullcontext(target)) as output:
+            progress = ProgressReporter(len(files), progress_interval)
+            if parallel_writers > 0 and new_index is None and _merge_positional(
+                    files, output, add_separators, stats, max_file_size, oversize_policy,
+                    parallel_writers, verify_utf8, progress, file_header, separator):
+                return True
+            
+            if stats.append_only and add_separators and not previous_index.trailing_separator():
+                # Die bisher letzte Datei ist es nicht mehr
+                put(separator)
+            
+            if document_stamp:
+                latest = (files.latest_mtime_ns() if isinstance(files, FileSet)
+                          else max((file_record(entry).mtime_ns for entry in files), default=0))
+                put((stamps.document_line(latest) + b'\n').replace(b'\n', newline))
+            
+            if toc is not None:
+                put(toc)
+                put(separator if add_separators else newline)
+            
+            for i in range(first, len(files)):
+                entry = files[i]
+                filepath = entry.path if isinstance(entry, FileRecord) else entry
+                oversized = is_oversized(entry)
                 
-                content = read_markdown_file(filepath)
-                if not content:
+                if oversized and oversize_policy == 'skip':
+                    # Zu große Dateien werden nie geöffnet
+                    stats.oversized.append(entry)
+                    omitted.add(filepath)
                     continue
                 
+                progress.update(i + 1, filepath)
+                
                 # Füge Header mit Dateinamen hinzu
-                filename = os.path.basename(filepath)
-                output.write(f"<!-- Quelle: {filepath} -->\n\n")
+                header = file_header(entry, filepath, i + 1)
+                if line_transform is not None:
+                    header = header.replace(b'\n', newline)
+                last_char = None
+                prefetched, data = reader.take(i) if reader else (False, None)
+                
+                reused = reusable(entry)
+                if new_index is not None:
+                    segment_start = position()
+                    digest = hashlib.blake2b(digest_size=16)
+                else:
+                    digest = None
                 
-                # Schreibe Dateiinhalt
-                output.write(content)
+                reference = duplicates.get(filepath)
+                if reference in omitted:
+                    # Das erste Vorkommen fehlt in der Ausgabe, die Datei wird normal behandelt
+                    reference = None
+                small = None
+                if (reused is None and reference is None and not prefetched and not oversized
+                        and line_transform is None
+                        and isinstance(entry, FileRecord) and entry.size <= SMALL_FILE_SIZE):
+                    small = read_plain(filepath, entry.size, verify_utf8 or not zero_copy)
+                
+                if reused is not None and reused['skipped']:
+                    # Schon beim letzten Lauf leer oder nicht lesbar
+                    skip_file(entry)
+                    continue
+                elif reused is not None:
+                    # Unveränderte Datei: Abschnitt samt Header aus der alten Ausgabe übernehmen
+                    drain()
+                    output.flush()
+                    length = reused['length']
+                    if kernel_copy(previous_output.fileno(), output.fileno(), length, reused['offset']) != length:
+                        raise OSError("Alte Ausgabedatei ist kürzer als im Segment-Index angegeben")
+                    last_char = '\n'
+                    stats.files_reused += 1
+                    if reference is not None:
+                        stats.files_deduplicated += 1
+                elif reference is not None:
+                    # Inhaltsgleich mit einer früheren Datei: nur ein Verweis darauf
+                    data = reference_line(reference) + newline
+                    put(header)
+                    put(data)
+                    if digest is not None:
+                        digest.update(data)
+                    last_char = '\n'
+                    stats.files_deduplicated += 1
+                elif prefetched:
+                    # Bereits im Hintergrund gelesen und dekodiert
+                    if data is None or (not data and not keep_empty):
+                        skip_file(entry)
+                        continue
+                    
+                    if line_transform is not None:
+                        data = line_transform.apply(data).encode('utf-8')
+                    put(header)
+                    put(data)
+                    if digest is not None:
+                        digest.update(data)
+                    last_char = data[-1:].decode('latin-1') or '\n'
+                    if oversized:
+                        stats.files_truncated += 1
+                elif oversized and oversize_policy == 'truncate':
+                    content = _read_markdown(filepath, max_bytes=max_file_size, newline=read_newline)
+                    if content is None or (not content and not keep_empty):
+                        skip_file(entry)
+                        continue
+                    
+                    if line_transform is not None:
+                        content = line_transform.apply(content)
+                    data = content.encode('utf-8')
+                    put(header)
+                    put(data)
+                    if digest is not None:
+                        digest.update(data)
+                    last_char = content[-1:] or '\n'
+                    stats.files_truncated += 1
+                elif small is not None:
+                    # Kleine Datei unverändert übernehmen: gelesen mit einem read(),
+                    # geschrieben zusammen mit Header und Trenner
+                    if not small:
+                        skip_file(entry)
+                        continue
+                    
+                    put(header)
+                    put(small)
+                    if digest is not None:
+                        digest.update(small)
+                    last_char = small[-1:].decode('latin-1')
+                elif zero_copy and (not to_stdout or isinstance(entry, FileRecord)):
+                    # Unveränderte Bytes kernelseitig kopieren, ohne Dekodieren und Kodieren
+                    size = entry.size if isinstance(entry, FileRecord) else None
+                    drain()
+                    last_byte = copy_passthrough(filepath, output, header, size, verify_utf8, digest)
+                    if last_byte == b'':
+                        skip_file(entry)
+                        continue
+                    if last_byte is not None:
+                        last_char = last_byte.decode('latin-1')
+                        stats.files_zero_copy += 1
+                        if to_stdout:
+                            output.advance(size)
+                        if not verify_utf8:
+                            # Der Inhalt lief nicht durch Python, es gibt keine Prüfsumme
+                            digest = None
+                    elif digest is not None:
+                        digest = hashlib.blake2b(digest_size=16)
+                
+                if last_char is None:
+                    # Schreibe Dateiinhalt stückweise, ohne die ganze Datei zu laden
+                    drain()
+                    last_char = stream_markdown_file(filepath, output, header, buffer_size, digest,
+                                                     line_transform)
+                    if last_char is None or (last_char == '' and not keep_empty):
+                        skip_file(entry)
+                        continue
+                    if last_char == '':
+                        # Leere Datei, die laut processing.skip_empty_files erhalten bleibt
+                        put(header)
+                        last_char = '\n'
+                    
+                    if oversized:
+                        stats.files_streamed += 1
                 
                 # Stelle sicher, dass Datei mit Zeilenumbruch endet
-                if not content.endswith('\n'):
-                    output.write('\n')
+                if last_char not in line_breaks:
+                    put(newline)
+                
+                if new_index is not None and isinstance(entry, FileRecord):
+                    if reused is not None:
+                        checksum = reused['hash']
+                    else:
+                        checksum = digest.hexdigest() if digest is not None else None
+                    new_index.add(entry, checksum, segment_start, position() - segment_start,
+                                  reference=reference)
                 
                 # Füge Trenner hinzu (außer bei der letzten Datei)
                 if add_separators and i < len(files) - 1:
-                    output.write('\n---\n\n')
+                    put(separator)
+                
+                stats.files_merged += 1
+            
+            drain()
+            
+            # Bytezahl direkt vom Ausgabestrom statt eines weiteren stat-Aufrufs
+            stats.bytes_written = output.tell()
+            
+            if new_index is not None:
+                # Umbenennen und fsync ändern die mtime nicht mehr
+                output.flush()
+                output_mtime_ns = os.fstat(output.fileno()).st_mtime_ns
+                output_tail_hash = tail_checksum(output.fileno(), stats.bytes_written)
+            
+            if reader:
+                stats.read_ahead_peak_depth = reader.peak_depth
+                stats.read_ahead_mean_depth = reader.mean_depth
+                stats.read_ahead_peak_bytes = reader.peak_bytes
+                stats.writer_blocked_seconds = reader.blocked_seconds
         
+        if compression and not to_stdout:
+            stats.bytes_compressed = os.path.getsize(output_file)
+        if new_index is not None:
+            new_index.save(index_file, stats.bytes_written, output_mtime_ns, output_tail_hash)
         return True
     
+    except BrokenPipeError:
+        # Der Empfänger hat die Pipe geschlossen; das entscheidet der Aufrufer
+        raise
     except Exception as e:
         print(f"Fehler beim Schreiben der Ausgabedatei '{output_file}': {e}", file=sys.stderr)
         return False
 
-def validate_input_files(files: List[str]) -> List[str]:
+def merge_sharded(files: FileSet, output_file: str, max_output_size: int = None,
+                  max_files_per_output: int = None, shard_workers: int = 1,
+                  stats: MergeStats = None, index: bool = False, **merge_options) -> bool:
     """
-    Validiert und filtert Eingabedateien.
+    Fügt Markdown-Dateien zu mehreren nummerierten Teildateien zusammen.
+    
+    Geteilt wird nur an Dateigrenzen. Die Größe einer Datei in der Ausgabe
+    wird aus Header, stat-Größe (bei Duplikaten mindestens die Länge des
+    Verweises), Zeilenumbruch und Trenner abgeschätzt, dazu
+    kommt je Teildatei ihr Zeitstempel pro Dokument. Das Vereinheitlichen der
+    Zeilenenden kürzt nur; mit output.line_ending '\r\n' kann dagegen jedes
+    Byte ein Zeilenumbruch sein, der ein Byte dazugewinnt, die Schätzung wird
+    dann verdoppelt. So bleibt sie eine Obergrenze. Jede Teildatei ist ein
+    eigenständiges Dokument und wird von einem
+    eigenen Thread mit merge_markdown_files geschrieben. Ein Manifest neben
+    der Ausgabe (AUSGABE.shards.json) listet die Quellen jeder Teildatei;
+    Teildateien eines früheren Laufs, die nicht mehr gebraucht werden, werden
+    gelöscht.
     
     Args:
-        files: Liste der zu validierenden Dateipfade
+        files: FileSet in Ausgabereihenfolge
+        output_file: Pfad der Ausgabe; die Teildateien heißen z. B. docs.001.md
+        max_output_size: Größenlimit pro Teildatei in Bytes
+        max_files_per_output: Höchstzahl der Quelldateien pro Teildatei
+        shard_workers: Anzahl gleichzeitig geschriebener Teildateien
+        stats: Optionales Objekt für die summierten Statistiken aller Teildateien
+        index: Je Teildatei einen Segment-Index pflegen
+        merge_options: Weitere Argumente für merge_markdown_files
         
     Returns:
-        Liste der gültigen Markdown-Dateien, sortiert nach ASCII-Codes
+        True, wenn alle Teildateien geschrieben wurden
+        
+    Raises:
+        ValueError: Bei add_toc zusammen mit max_output_size; das Inhaltsverzeichnis
+            einer Teildatei steht erst nach dem Aufteilen fest
     """
-    valid_files = []
+    if max_output_size and merge_options.get('add_toc'):
+        raise ValueError(TOC_SIZE_LIMIT_ERROR)
+    if stats is None:
+        stats = MergeStats()
     
-    for file in files:
-        if not os.path.exists(file):
-            print(f"Warnung: Datei '{file}' existiert nicht und wird übersprungen.", file=sys.stderr)
-            continue
-        
-        if not os.path.isfile(file):
-            print(f"Warnung: '{file}' ist keine Datei und wird übersprungen.", file=sys.stderr)
-            continue
+    max_file_size = merge_options.get('max_file_size')
+    oversize_policy = merge_options.get('oversize_policy', 'skip')
+    stamp_size = FILE_TIMESTAMP_SIZE if merge_options.get('timestamps') in ('file', 'both') else 0
+    # Jede Teildatei beginnt mit ihrem eigenen Zeitstempel pro Dokument
+    document_size = DOCUMENT_TIMESTAMP_SIZE if merge_options.get('timestamps') in ('document', 'both') else 0
+    header_template = merge_options.get('header_template') or HeaderTemplate(DEFAULT_HEADER_FORMAT)
+    separator = merge_options.get('separator', SEPARATOR)
+    transform = merge_options.get('transform')
+    # Jedes '\n' wird zu output.line_ending
+    growth = len(transform.line_ending) if transform is not None and not transform.identity else 1
+    duplicates = merge_options.get('duplicates') or {}
+    
+    def segment_size(record: FileRecord) -> int:
+        size = record.size
+        if max_file_size is not None and size > max_file_size:
+            if oversize_policy == 'skip':
+                return 0
+            if oversize_policy == 'truncate':
+                size = max_file_size
+        reference = duplicates.get(record.path)
+        if reference is not None:
+            # Statt des Inhalts steht der Verweis samt Zeilenende, der auch länger sein kann
+            size = max(size, len(reference_line(reference)) + 1)
+        # Die Position in der Teildatei ist noch offen, höchstens len(files)
+        header = header_template.size_bound(record, record.path, len(files)) + stamp_size
+        return ((header + 1 if header else 0) + size + 1 + len(separator)) * growth
+    
+    # Teildateien als Positionsbereiche; die Dateien selbst werden erst beim Schreiben herausgegriffen
+    groups = plan_shards(files, segment_size, max_output_size, max_files_per_output, document_size * growth)
+    paths = [shard_path(output_file, number, len(groups)) for number in range(1, len(groups) + 1)]
+    shard_stats = [MergeStats() for _ in groups]
+    
+    def write_shard(number: int) -> bool:
+        index_file = default_index_file(paths[number]) if index else None
+        group = groups[number]
+        return merge_markdown_files(files[group.start:group.stop], paths[number], stats=shard_stats[number],
+                                    index_file=index_file, **merge_options)
+    
+    with ThreadPoolExecutor(max_workers=max(1, shard_workers), thread_name_prefix='md-shard') as pool:
+        results = list(pool.map(write_shard, range(len(groups))))
+    
+    for shard in shard_stats:
+        stats.add(shard)
+    stats.shards = paths
+    if not all(results):
+        return False
+    
+    manifest_file = shard_manifest_file(output_file)
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as file:
+            previous_paths = [shard['path'] for shard in json.load(file)['shards']]
+    except (OSError, ValueError, KeyError, TypeError):
+        previous_paths = []
+    
+    try:
+        write_shard_manifest(manifest_file, [
+            {'path': path, 'bytes': shard.bytes_written, 'sources': [files[i].path for i in group]}
+            for path, shard, group in zip(paths, shard_stats, groups)
+        ])
+    except OSError as e:
+        print(f"Fehler beim Schreiben des Manifests '{manifest_file}': {e}", file=sys.stderr)
+        return False
+    
+    # Überzählige Teildateien eines früheren Laufs mit mehr Teilen entfernen
+    for path in set(previous_paths) - set(paths):
+        for stale in (path, default_index_file(path)):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    return True
+
+def max_file_size_mb_option(cli_value: float = None, config_value=None) -> Union[float, None]:
+    """
+    Größenlimit pro Eingabedatei aus --max-file-size-mb oder filters.max_file_size_mb.
+    
+    Args:
+        cli_value: Wert von --max-file-size-mb (0 = unbegrenzt), hat Vorrang
+        config_value: Wert aus der Konfiguration (null = unbegrenzt); auch als
+            Zeichenkette wie "10"
         
-        if not file.lower().endswith('.md'):
-            print(f"Warnung: '{file}' ist keine Markdown-Datei und wird übersprungen.", file=sys.stderr)
-            continue
+    Returns:
+        Limit in MB oder None für unbegrenzt
         
-        valid_files.append(file)
+    Raises:
+        ValueError: Bei negativen Werten, in der Konfiguration auch bei 0
+            oder nicht numerischen Werten
+    """
+    if cli_value is not None:
+        if cli_value < 0:
+            raise ValueError(f"Ungültiges --max-file-size-mb: {cli_value:g} (muss mindestens 0 sein)")
+        return cli_value or None
     
-    # Sortiere nach ASCII-Codes
-    return sorted(valid_files)
+    if config_value is None:
+        return None
+    value = None
+    # bool ist eine Zahl, als Größenlimit aber sicher ein Versehen
+    if not isinstance(config_value, bool):
+        try:
+            value = float(config_value)
+        except (TypeError, ValueError):
+            pass
+    if value is None or not 0 < value < float('inf'):
+        raise ValueError(f"Ungültiges filters.max_file_size_mb: {config_value!r} (erwartet: Zahl größer 0)")
+    return value
+
+def validate_input_files(files: List[str]) -> List[str]:
+    """
+    Validiert und filtert Eingabedateien.
+    
+    Args:
+        files: Liste der zu validierenden Dateipfade
+        
+    Returns:
+        Liste der gültigen Markdown-Dateien, sortiert nach ASCII-Codes
+    """
+    return [record.path for record in stat_input_files(files)]
 
 def main():
     """Hauptfunktion des CLI-Tools."""
@@ -139,6 +1007,7 @@ Beispiele:
   %(prog)s -f datei1.md datei2.md -o zusammengefuegt.md
   %(prog)s -d ./docs -o alle_docs.md
   %(prog)s -f *.md -o output.md --no-separators
+  %(prog)s -d ./docs -o - | pandoc -o docs.pdf
         '''
     )
     
@@ -158,10 +1027,16 @@ Beispiele:
     parser.add_argument(
         '-o', '--output',
         required=True,
-        help='Pfad zur Ausgabedatei'
+        help="Pfad zur Ausgabedatei ('-' für die Standardausgabe; Meldungen dann auf stderr)"
     )
     
     # Weitere Optionen
+    parser.add_argument(
+        '-c', '--config',
+        metavar='DATEI',
+        help='Konfigurationsdatei (YAML oder JSON), z. B. md_merger_config.yml'
+    )
+    
     parser.add_argument(
         '--no-separators',
         action='store_true',
@@ -174,15 +1049,246 @@ Beispiele:
         help='Überschreibe Ausgabedatei ohne Nachfrage'
     )
     
+    parser.add_argument(
+        '--max-file-size-mb',
+        type=float,
+        metavar='MB',
+        help='Größenlimit pro Eingabedatei (Standard: filters.max_file_size_mb, 0 = unbegrenzt)'
+    )
+    
+    parser.add_argument(
+        '--oversize-policy',
+        choices=OVERSIZE_POLICIES,
+        default='skip',
+        help='Umgang mit zu großen Dateien: überspringen, an einer Zeilengrenze kürzen '
+             'oder unverändert stückweise kopieren (Standard: skip)'
+    )
+    
+    parser.add_argument(
+        '--buffer-size',
+        type=int,
+        default=STREAM_CHUNK_SIZE,
+        metavar='BYTES',
+        help=f'Blockgröße beim stückweisen Kopieren der Eingabedateien (Standard: {STREAM_CHUNK_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--no-zero-copy',
+        action='store_true',
+        help='Dateiinhalte immer dekodieren und neu kodieren statt kernelseitig zu kopieren'
+    )
+    
+    parser.add_argument(
+        '--no-verify-utf8',
+        action='store_true',
+        help='Beim kernelseitigen Kopieren nicht auf gültiges UTF-8 prüfen '
+             '(Bytes inkl. CRLF werden unverändert übernommen)'
+    )
+    
+    parser.add_argument(
+        '--read-ahead',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Bis zu N Dateien im Hintergrund vorlesen, während geschrieben wird (Standard: 0 = aus)'
+    )
+    
+    parser.add_argument(
+        '--read-ahead-mb',
+        type=float,
+        default=READ_AHEAD_BYTES / (1024 * 1024),
+        metavar='MB',
+        help=f'Speicherbudget für vorgelesene Dateien (Standard: {READ_AHEAD_BYTES // (1024 * 1024)} MB)'
+    )
+    
+    parser.add_argument(
+        '--parallel-writers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Dateien mit N Threads parallel an vorausberechnete Positionen schreiben (Standard: 0 = aus)'
+    )
+    
+    parser.add_argument(
+        '--write-buffer',
+        type=int,
+        default=DEFAULT_WRITE_BUFFER,
+        metavar='BYTES',
+        help=f'Größe des Schreibpuffers der Ausgabedatei (Standard: {DEFAULT_WRITE_BUFFER})'
+    )
+    
+    parser.add_argument(
+        '--fsync',
+        choices=FSYNC_POLICIES,
+        default='none',
+        help='Ausgabe vor dem atomaren Ersetzen (bzw. nach dem Anhängen mit --append-in-place) '
+             'synchronisieren: gar nicht, nur die Datei oder Datei und Verzeichnis (Standard: none)'
+    )
+    
+    parser.add_argument(
+        '--compress-level',
+        type=int,
+        metavar='N',
+        help='Kompressionsstufe bei Ausgabe auf .gz, .bz2 oder .xz '
+             '(Standard: gzip 6, bz2 9, xz 6)'
+    )
+    
+    parser.add_argument(
+        '--compress-workers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='gzip mit N Threads in unabhängigen Blöcken komprimieren (Standard: 0 = ein Strom)'
+    )
+    
+    parser.add_argument(
+        '--max-output-size',
+        type=parse_size,
+        metavar='GRÖSSE',
+        help='Ausgabe an Dateigrenzen in nummerierte Teildateien (z. B. docs.001.md) '
+             'von höchstens GRÖSSE aufteilen, z. B. 500M oder 2G (nicht mit output.add_toc)'
+    )
+    
+    parser.add_argument(
+        '--max-files-per-output',
+        type=int,
+        metavar='N',
+        help='Höchstens N Quelldateien pro Teildatei'
+    )
+    
+    parser.add_argument(
+        '--shard-workers',
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        metavar='N',
+        help='Anzahl gleichzeitig geschriebener Teildateien (Standard: min(4, Anzahl CPUs))'
+    )
+    
+    parser.add_argument(
+        '--progress-interval',
+        type=float,
+        default=PROGRESS_INTERVAL,
+        metavar='SEK',
+        help=f'Fortschritt höchstens alle SEK Sekunden melden (Standard: {PROGRESS_INTERVAL:g}, 0 = jede Datei)'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        choices=DEDUP_MODES,
+        default='off',
+        help='Inhaltsgleiche Dateien erkennen: off (alle übernehmen, Standard), skip (nur das erste '
+             'Vorkommen übernehmen) oder reference (statt des Inhalts auf das erste Vorkommen verweisen)'
+    )
+    
+    parser.add_argument(
+        '--dedup-workers',
+        type=int,
+        default=DEFAULT_DEDUP_WORKERS,
+        metavar='N',
+        help=f'Threads zum Hashen gleich großer Dateien für --dedup (Standard: {DEFAULT_DEDUP_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--index',
+        action='store_true',
+        help='Segment-Index neben der Ausgabe pflegen (AUSGABE.index.json) und Abschnitte '
+             'unveränderter Dateien beim nächsten Lauf aus der alten Ausgabe übernehmen'
+    )
+    
+    parser.add_argument(
+        '--append-in-place',
+        action='store_true',
+        help='Mit --index: kommen nur neue Dateien am Ende hinzu, diese direkt an die bestehende '
+             'Ausgabe anhängen statt sie atomar zu ersetzen (schneller, aber Leser können eine '
+             'halb verlängerte Ausgabe sehen)'
+    )
+    
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=DEFAULT_SCAN_WORKERS,
+        metavar='N',
+        help=f'Anzahl paralleler Threads beim Durchsuchen von Verzeichnissen (Standard: {DEFAULT_SCAN_WORKERS}, 1 = seriell)'
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        metavar='DATEI',
+        help='Scan-Manifest für inkrementelles Durchsuchen im Verzeichnismodus (wird angelegt bzw. aktualisiert)'
+    )
+    
+    parser.add_argument(
+        '--full-rescan',
+        action='store_true',
+        help='Scan-Manifest ignorieren und das Verzeichnis vollständig neu durchsuchen'
+    )
+    
+    parser.add_argument(
+        '--follow-symlinks',
+        action='store_true',
+        help='Symbolischen Links auf Verzeichnisse folgen (jedes Verzeichnis wird nur einmal betreten, '
+             'Schleifen werden übersprungen) und jede physische Datei nur einmal übernehmen'
+    )
+    
+    parser.add_argument(
+        '--timestamps',
+        choices=TIMESTAMP_MODES,
+        help='Änderungszeiten ausgeben: off, file (pro Datei), document (jüngste Datei am Anfang) '
+             'oder both (Standard: output.add_timestamps, true = file)'
+    )
+    
     args = parser.parse_args()
     
+    if args.output != STDOUT_PATH:
+        run_merge(args)
+        return
+    
+    # Daten gehen auf stdout, alle Meldungen auf stderr
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            run_merge(args)
+    except BrokenPipeError:
+        # Der Empfänger hat vorzeitig beendet (z. B. head): still abbrechen wie bei SIGPIPE,
+        # ohne dass der Interpreter beim Beenden erneut in die Pipe schreibt
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.__stdout__.fileno())
+        sys.exit(128 + getattr(signal, 'SIGPIPE', 13))
+
+def run_merge(args: argparse.Namespace):
+    """Führt Suche und Zusammenfügung für die geparsten Argumente aus."""
+    config = MergerConfig(args.config)
+    to_stdout = args.output == STDOUT_PATH
+    
+    # processing.* und output.line_ending werden einmal zu einer Umwandlung übersetzt
+    try:
+        transform = TransformOptions.from_config(config)
+        timestamps = args.timestamps or timestamp_mode(config.get('output.add_timestamps', False))
+        # separators.* werden einmal zerlegt und kodiert, nicht pro Datei
+        header_template = HeaderTemplate(
+            config.get('separators.header_format', DEFAULT_HEADER_FORMAT)
+            if config.get('separators.add_file_headers', True) else None,
+            base_dir=args.directory)
+        separator = separator_bytes(config.get('separators.between_files', DEFAULT_BETWEEN_FILES))
+        # Ausschlussmuster einmal kompiliert, bevor gesucht wird
+        exclude = ExcludeMatcher.from_config(config)
+        max_file_size_mb = max_file_size_mb_option(args.max_file_size_mb, config.get('filters.max_file_size_mb'))
+    except ValueError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+    
     # Sammle Eingabedateien
     if args.files:
         if len(args.files) < 2:
             print("Fehler: Mindestens zwei Dateien müssen angegeben werden.", file=sys.stderr)
             sys.exit(1)
         
-        input_files = validate_input_files(args.files)
+        input_files = stat_input_files(args.files)
+        if args.follow_symlinks:
+            scan_stats = ScanStats()
+            input_files = unique_physical_files(input_files, scan_stats)
+            if scan_stats.duplicate_files:
+                print(f"Mehrfach angegebene Dateien (gleiche Datei über andere Pfade): "
+                      f"{scan_stats.duplicate_files:,}")
     else:
         if not os.path.exists(args.directory):
             print(f"Fehler: Verzeichnis '{args.directory}' existiert nicht.", file=sys.stderr)
@@ -192,8 +1298,42 @@ Beispiele:
             print(f"Fehler: '{args.directory}' ist kein Verzeichnis.", file=sys.stderr)
             sys.exit(1)
         
-        input_files = collect_md_files_from_directory(args.directory)
-        input_files = validate_input_files(input_files)
+        if args.follow_symlinks and args.manifest:
+            print("Fehler: --follow-symlinks ist mit --manifest nicht möglich.", file=sys.stderr)
+            sys.exit(1)
+        
+        # Suche und Validierung in einem Durchgang: ein stat pro Datei
+        scan_stats = ScanStats()
+        input_files = discover_markdown_files(
+            args.directory,
+            workers=args.scan_workers,
+            manifest_file=args.manifest,
+            full_rescan=args.full_rescan,
+            exclude=exclude,
+            stats=scan_stats,
+            follow_symlinks=args.follow_symlinks
+        )
+        
+        if scan_stats.pruned_dirs or scan_stats.pruned_entries:
+            print(f"Ausgeschlossen (filters.exclude_patterns): {scan_stats.pruned_dirs:,} Verzeichnisse, "
+                  f"{scan_stats.pruned_entries:,} Dateien")
+        
+        if scan_stats.duplicate_dirs or scan_stats.symlink_loops or scan_stats.duplicate_files:
+            print(f"Mehrfach erreichbar (--follow-symlinks): {scan_stats.duplicate_dirs:,} Verzeichnisse, "
+                  f"{scan_stats.duplicate_files:,} Dateien, {scan_stats.symlink_loops:,} Schleifen übersprungen")
+    
+    # Größenlimit anhand der stat-Daten aus der Suche, ohne eine Datei zu öffnen
+    max_file_size = int(max_file_size_mb * 1024 * 1024) if max_file_size_mb else None
+    
+    within_limit, oversized = split_oversized(input_files, max_file_size)
+    if args.oversize_policy == 'skip':
+        input_files = within_limit
+    
+    if oversized:
+        action = {'skip': 'übersprungen', 'truncate': 'gekürzt', 'stream': 'stückweise kopiert'}[args.oversize_policy]
+        print(f"Größer als {max_file_size_mb:g} MB, werden {action} ({len(oversized)}):")
+        for file in oversized:
+            print(f"  - {file.path} ({file.size:,} Bytes)")
     
     # Prüfe, ob Eingabedateien gefunden wurden
     if not input_files:
@@ -204,9 +1344,46 @@ Beispiele:
         print("Fehler: Mindestens zwei gültige Markdown-Dateien sind erforderlich.", file=sys.stderr)
         sys.exit(1)
     
-    # Prüfe Ausgabedatei
-    if os.path.exists(args.output) and not args.force:
-        response = input(f"Ausgabedatei '{args.output}' existiert bereits. Überschreiben? (j/N): ")
+    # Inhaltsgleiche Dateien: gehasht werden nur Dateien mit gleicher Größe
+    duplicates = None
+    if args.dedup != 'off':
+        duplicates = find_duplicates(input_files, args.dedup_workers)
+        if duplicates:
+            print(f"Inhaltsgleiche Dateien ({len(duplicates)}):")
+            for path, original in duplicates.items():
+                print(f"  - {path} = {original}")
+        if args.dedup == 'skip':
+            input_files = input_files.select(i for i, file in enumerate(input_files) if file.path not in duplicates)
+            duplicates = None
+    
+    # Komprimierte Ausgabe anhand der Endung (.gz, .bz2, .xz)
+    compression = compression_for(args.output)
+    if compression and args.index:
+        print("Fehler: --index ist mit komprimierter Ausgabe nicht möglich.", file=sys.stderr)
+        sys.exit(1)
+    
+    if to_stdout and args.index:
+        print("Fehler: --index ist bei Ausgabe auf stdout nicht möglich.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.append_in_place and not args.index:
+        print("Fehler: --append-in-place ist nur zusammen mit --index möglich.", file=sys.stderr)
+        sys.exit(1)
+    
+    sharded = bool(args.max_output_size or args.max_files_per_output)
+    if sharded and to_stdout:
+        print("Fehler: Teildateien sind bei Ausgabe auf stdout nicht möglich.", file=sys.stderr)
+        sys.exit(1)
+    
+    add_toc = bool(config.get('output.add_toc', False))
+    if add_toc and args.max_output_size:
+        print(f"Fehler: {TOC_SIZE_LIMIT_ERROR}", file=sys.stderr)
+        sys.exit(1)
+    
+    # Prüfe Ausgabedatei (bei Teildateien deren Manifest)
+    existing_output = shard_manifest_file(args.output) if sharded else args.output
+    if not to_stdout and os.path.exists(existing_output) and not args.force:
+        response = input(f"Ausgabedatei '{existing_output}' existiert bereits. Überschreiben? (j/N): ")
         if response.lower() not in ['j', 'ja', 'y', 'yes']:
             print("Abgebrochen.")
             sys.exit(0)
@@ -214,23 +1391,75 @@ Beispiele:
     # Zeige Zusammenfassung
     print(f"Gefundene Dateien ({len(input_files)}):")
     for file in input_files:
-        print(f"  - {file}")
+        print(f"  - {file.path}")
     print(f"\nAusgabe: {args.output}")
     print()
     
     # Führe Zusammenfügung durch
-    success = merge_markdown_files(
-        input_files, 
-        args.output, 
-        add_separators=not args.no_separators
+    stats = MergeStats()
+    merge_options = dict(
+        add_separators=not args.no_separators,
+        max_file_size=max_file_size,
+        oversize_policy=args.oversize_policy,
+        buffer_size=args.buffer_size,
+        zero_copy=not args.no_zero_copy,
+        verify_utf8=not args.no_verify_utf8,
+        read_ahead=args.read_ahead,
+        read_ahead_bytes=int(args.read_ahead_mb * 1024 * 1024),
+        parallel_writers=args.parallel_writers,
+        write_buffer_size=args.write_buffer,
+        fsync_policy=args.fsync,
+        compression=compression,
+        compression_level=args.compress_level,
+        compression_workers=args.compress_workers,
+        progress_interval=args.progress_interval,
+        duplicates=duplicates,
+        transform=transform,
+        add_toc=add_toc,
+        timestamps=timestamps,
+        header_template=header_template,
+        separator=separator,
+        append_in_place=args.append_in_place
     )
     
+    if sharded:
+        success = merge_sharded(input_files, args.output, args.max_output_size, args.max_files_per_output,
+                                args.shard_workers, stats=stats, index=args.index, **merge_options)
+    else:
+        index_file = default_index_file(args.output) if args.index else None
+        success = merge_markdown_files(input_files, args.output, stats=stats, index_file=index_file,
+                                       **merge_options)
+    
     if success:
-        print(f"\nErfolgreich! {len(input_files)} Dateien wurden zu '{args.output}' zusammengefügt.")
+        if sharded:
+            print(f"\nErfolgreich! {len(input_files)} Dateien wurden auf {len(stats.shards)} Teildateien "
+                  f"aufgeteilt (Manifest: {shard_manifest_file(args.output)}).")
+        else:
+            print(f"\nErfolgreich! {len(input_files)} Dateien wurden zu '{args.output}' zusammengefügt.")
+        
+        # Zeige Statistiken (aus den stat-Daten der Suche, ohne erneute Abfrage)
+        input_size = input_files.total_size()
+        print(f"Größe der Eingabedateien: {input_size:,} Bytes")
+        print(f"Größe der Ausgabedatei: {stats.bytes_written:,} Bytes")
+        if compression:
+            print(f"Komprimiert ({compression}): {stats.bytes_compressed:,} Bytes")
+        
+        if stats.append_only:
+            print(f"Nur angehängt: {stats.files_merged - stats.files_reused} neue Dateien, "
+                  f"{stats.files_reused} blieben unverändert")
+        elif args.index:
+            print(f"Aus der alten Ausgabe übernommen: {stats.files_reused} von {stats.files_merged} Dateien")
+        
+        if stats.toc_entries:
+            print(f"Inhaltsverzeichnis: {stats.toc_entries:,} Einträge")
+        
+        if args.dedup == 'reference':
+            print(f"Duplikate als Verweis geschrieben: {stats.files_deduplicated}")
         
-        # Zeige Statistiken
-        output_size = os.path.getsize(args.output)
-        print(f"Größe der Ausgabedatei: {output_size:,} Bytes")
+        if args.read_ahead > 0:
+            print(f"Vorlesen: Warteschlange Ø {stats.read_ahead_mean_depth:.1f} / max {stats.read_ahead_peak_depth}, "
+                  f"max {stats.read_ahead_peak_bytes:,} Bytes im Umlauf, "
+                  f"Schreiber blockiert {stats.writer_blocked_seconds:.3f} s")
     else:
         print("\nFehler beim Zusammenfügen der Dateien.", file=sys.stderr)
         sys.exit(1)
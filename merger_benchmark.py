@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+Benchmarks für MD-Merger
+
+Aufruf: python merger_benchmark.py <benchmark> [Optionen]
+"""
+
+import os
+import argparse
+import contextlib
+import cProfile
+import hashlib
+import io
+import pstats
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterable, Iterator, List
+
+from merger_discovery import FileRecord, FileSet, discover_markdown_files, scan_markdown_tree
+from merger_hashset import Hash64Set
+from merger_shards import parse_size
+from merger_timestamps import Timestamps
+from merger_transform import LineTransform, TransformOptions
+
+
+def _best_of(func: Callable, repeat: int) -> float:
+    """Führt eine Funktion mehrfach aus und gibt die beste Laufzeit in Sekunden zurück."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _legacy_collect(directory: str) -> List[str]:
+    """Ursprüngliche os.walk-Implementierung als Vergleichsbasis."""
+    md_files = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if file.lower().endswith('.md'):
+                md_files.append(os.path.join(root, file))
+    return md_files
+
+
+def _make_deep_tree(root: str, depth: int, files_per_dir: int):
+    """Erzeugt eine tiefe Verzeichniskette mit je zwei Geschwistern pro Ebene."""
+    path = root
+    for level in range(depth):
+        for sibling in ('a', 'b'):
+            sibling_path = os.path.join(path, f'{sibling}{level}')
+            os.makedirs(sibling_path)
+            for i in range(files_per_dir):
+                with open(os.path.join(sibling_path, f'{i:04d}.md'), 'w') as file:
+                    file.write('# x\n')
+        path = os.path.join(path, f'a{level}')
+
+
+def _make_wide_tree(root: str, width: int, files_per_dir: int):
+    """Erzeugt zwei Ebenen mit jeweils vielen Verzeichnissen."""
+    for outer in range(width):
+        for inner in range(width):
+            path = os.path.join(root, f'd{outer:03d}', f'd{inner:03d}')
+            os.makedirs(path)
+            for i in range(files_per_dir):
+                with open(os.path.join(path, f'{i:04d}.md'), 'w') as file:
+                    file.write('# x\n')
+
+
+def _make_markdown_file(path: str, size: int):
+    """Erzeugt eine Markdown-Datei der angegebenen Größe aus gleichartigen Zeilen."""
+    line = b'Lorem ipsum dolor sit amet, \xc3\xa4\xc3\xb6\xc3\xbc consectetur adipiscing elit.\n'
+    block = line * (1024 * 1024 // len(line) + 1)
+    with open(path, 'wb') as file:
+        remaining = size
+        while remaining > 0:
+            part = block[:remaining]
+            file.write(part)
+            remaining -= len(part)
+
+
+def _legacy_merge(files: List[str], output_file: str):
+    """Ursprüngliches Zusammenfügen mit vollständigem read() als Vergleichsbasis."""
+    with open(output_file, 'w', encoding='utf-8') as output:
+        for i, filepath in enumerate(files):
+            with open(filepath, 'r', encoding='utf-8') as file:
+                content = file.read()
+            if not content:
+                continue
+            output.write(f"<!-- Quelle: {filepath} -->\n\n")
+            output.write(content)
+            if not content.endswith('\n'):
+                output.write('\n')
+            if i < len(files) - 1:
+                output.write('\n---\n\n')
+
+
+def bench_merge_rss(args):
+    """Interner Schritt: führt einen Merge im eigenen Prozess aus und meldet das Spitzen-RSS."""
+    from markdown_merger_c_l_i import merge_markdown_files
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == 'legacy':
+            _legacy_merge(args.files, args.output)
+        else:
+            merge_markdown_files(args.files, args.output, buffer_size=args.buffer_size)
+
+    # ru_maxrss ist unter Linux in KiB angegeben
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _measure_rss(mode: str, files: List[str], output_file: str, buffer_size: int) -> int:
+    """Misst das Spitzen-RSS eines Merges in einem frischen Prozess (in KiB)."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '_merge-rss', mode,
+         '--buffer-size', str(buffer_size), '-o', output_file, *files],
+        check=True, stdout=subprocess.PIPE, text=True
+    )
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def bench_memory(args):
+    """Misst den Speicherbedarf beim Zusammenfügen unterschiedlich großer Dateien."""
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        small = os.path.join(workdir, 'klein.md')
+        _make_markdown_file(small, 1024)
+        output_file = os.path.join(workdir, 'out.md')
+
+        print(f"{'Eingabe':>10}  {'stückweise':>12}  {'read()':>12}")
+        for text in args.sizes:
+            size = parse_size(text)
+            large = os.path.join(workdir, 'gross.md')
+            _make_markdown_file(large, size)
+
+            streamed = _measure_rss('stream', [large, small], output_file, args.buffer_size)
+            if size <= parse_size(args.legacy_max):
+                legacy = f"{_measure_rss('legacy', [large, small], output_file, args.buffer_size) / 1024:9.1f} MiB"
+            else:
+                legacy = '-'
+            print(f"{text:>10}  {streamed / 1024:9.1f} MiB  {legacy:>12}")
+
+            os.unlink(large)
+    finally:
+        shutil.rmtree(workdir)
+
+
+def _file_digest(path: str) -> str:
+    """Berechnet eine Prüfsumme über die ganze Datei, blockweise gelesen."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _make_corpus(directory: str, total: int, file_size: int) -> List[str]:
+    """Erzeugt einen Korpus aus gleich großen Markdown-Dateien."""
+    files = []
+    for i in range((total + file_size - 1) // file_size):
+        path = os.path.join(directory, f'{i:06d}.md')
+        _make_markdown_file(path, min(file_size, total - i * file_size))
+        files.append(path)
+    return files
+
+
+def bench_zerocopy(args):
+    """Vergleicht Dekodieren/Kodieren mit dem kernelseitigen Kopieren."""
+    from markdown_merger_c_l_i import merge_markdown_files
+
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        total = parse_size(args.total)
+        files = _make_corpus(workdir, total, parse_size(args.file_size))
+        output_file = os.path.join(workdir, 'out.md')
+        variants = [
+            ('dekodieren/kodieren', {'zero_copy': False}),
+            ('Kernel + UTF-8-Prüfung', {'zero_copy': True}),
+            ('Kernel ohne Prüfung', {'zero_copy': True, 'verify_utf8': False}),
+        ]
+
+        print(f"Korpus: {len(files):,} Dateien, {total / 1024 ** 3:.2f} GiB")
+        reference = None
+        for name, options in variants:
+            def run():
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    merge_markdown_files(files, output_file, **options)
+
+            elapsed = _best_of(run, args.repeat)
+            digest = _file_digest(output_file)
+            reference = reference or digest
+            status = '' if digest == reference else '  (ABWEICHUNG!)'
+            print(f"  {name:24s} {elapsed:8.2f} s  {total / elapsed / 1024 ** 2:9.1f} MiB/s{status}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_fsync(args):
+    """Misst die Kosten der fsync-Strategien beim atomaren Schreiben."""
+    from markdown_merger_c_l_i import merge_markdown_files
+    from merger_output import FSYNC_POLICIES
+
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        total = parse_size(args.total)
+        files = _make_corpus(workdir, total, parse_size(args.file_size))
+        output_file = os.path.join(workdir, 'out.md')
+
+        print(f"Korpus: {len(files):,} Dateien, {total / 1024 ** 2:.1f} MiB, Verzeichnis {workdir}")
+        baseline = None
+        for policy in FSYNC_POLICIES:
+            def run():
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    merge_markdown_files(files, output_file, fsync_policy=policy,
+                                         write_buffer_size=args.write_buffer)
+
+            elapsed = _best_of(run, args.repeat)
+            baseline = baseline or elapsed
+            print(f"  fsync={policy:9s} {elapsed * 1000:9.1f} ms  (+{(elapsed - baseline) * 1000:.1f} ms)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def _make_tiny_corpus(directory: str, count: int, file_size: int, per_dir: int = 1000) -> List[str]:
+    """Erzeugt count kleine Markdown-Dateien zu je file_size Bytes in Unterverzeichnissen."""
+    line = b'Kurzer Absatz mit \xc3\xa4\xc3\xb6\xc3\xbc.\n'
+    content = (b'# Notiz\n' + line * (file_size // len(line) + 1))[:file_size - 1] + b'\n'
+    files = []
+    for i in range(count):
+        subdir = os.path.join(directory, f'{i // per_dir:04d}')
+        if i % per_dir == 0:
+            os.makedirs(subdir)
+        path = os.path.join(subdir, f'{i % per_dir:04d}.md')
+        with open(path, 'wb') as file:
+            file.write(content)
+        files.append(path)
+    return files
+
+
+def bench_coalesce(args):
+    """Misst den Aufwand pro Datei bei sehr vielen kleinen Dateien."""
+    from markdown_merger_c_l_i import merge_markdown_files
+    from merger_discovery import stat_input_files
+
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        started = time.perf_counter()
+        paths = _make_tiny_corpus(workdir, args.files, parse_size(args.file_size))
+        records = stat_input_files(paths)
+        paths = [record.path for record in records]
+        output_file = os.path.join(workdir, 'out.md')
+        print(f"Korpus: {len(paths):,} Dateien zu {args.file_size} "
+              f"(angelegt in {time.perf_counter() - started:.1f} s)")
+
+        def legacy():
+            # Ursprüngliche Schleife: vier write()-Aufrufe und eine Zeile pro Datei
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                with open(output_file, 'w', encoding='utf-8') as output:
+                    for i, filepath in enumerate(paths):
+                        print(f"Verarbeite: {filepath}")
+                        with open(filepath, 'r', encoding='utf-8') as file:
+                            content = file.read()
+                        output.write(f"<!-- Quelle: {filepath} -->\n\n")
+                        output.write(content)
+                        if not content.endswith('\n'):
+                            output.write('\n')
+                        if i < len(paths) - 1:
+                            output.write('\n---\n\n')
+
+        def merge(interval: float):
+            def run():
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    merge_markdown_files(records, output_file, progress_interval=interval)
+            return run
+
+        variants = [
+            ('ursprünglich', legacy),
+            ('gebündelt, Zeile pro Datei', merge(0)),
+            ('gebündelt, gedrosselt', merge(1.0)),
+        ]
+
+        reference = None
+        baseline = None
+        for name, run in variants:
+            elapsed = _best_of(run, args.repeat)
+            digest = _file_digest(output_file)
+            reference = reference or digest
+            baseline = baseline or elapsed
+            status = '' if digest == reference else '  (ABWEICHUNG!)'
+            print(f"  {name:28s} {elapsed:8.2f} s  {elapsed / len(paths) * 1e6:7.2f} µs/Datei  "
+                  f"(x{baseline / elapsed:.2f}){status}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_timestamps(args):
+    """Misst die Kosten der Zeitstempel pro Datei: getmtime + strftime gegen vorkompiliert aus der Suche."""
+    from markdown_merger_c_l_i import merge_markdown_files
+    from merger_discovery import stat_input_files
+
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        paths = _make_tiny_corpus(workdir, args.files, parse_size(args.file_size))
+        records = stat_input_files(paths)
+        output_file = os.path.join(workdir, 'out.md')
+        print(f"Korpus: {len(records):,} Dateien zu {args.file_size}")
+
+        paths = [record.path for record in records]
+        mtimes = [record.mtime_ns for record in records]
+
+        def naive():
+            # Zweite Abfrage pro Datei und strftime für jeden Zeitstempel
+            for path in paths:
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(path)))
+
+        def precompiled():
+            file_line = Timestamps('file').file_line
+            for mtime_ns in mtimes:
+                file_line(mtime_ns)
+
+        for name, run in [('getmtime + strftime', naive), ('vorkompiliert (FileRecord)', precompiled)]:
+            elapsed = _best_of(run, args.repeat)
+            print(f"  {name:28s} {elapsed:8.2f} s  {elapsed / len(records) * 1e6:7.2f} µs/Datei")
+
+        # Anteil am Profil eines ganzen Merges mit Zeitstempeln pro Datei
+        profiler = cProfile.Profile()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            profiler.runcall(merge_markdown_files, records, output_file, timestamps='file',
+                             progress_interval=1.0)
+        profile = pstats.Stats(profiler)
+        total = profile.total_tt
+        stamp_time = sum(stat[2] for (filename, _, _), stat in profile.stats.items()
+                         if filename.endswith('merger_timestamps.py'))
+        print(f"  Merge mit Zeitstempeln: {total:.2f} s im Profil, davon Zeitstempel {stamp_time:.3f} s "
+              f"({stamp_time / total * 100:.1f} %)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_discovery(args):
+    """Vergleicht os.walk mit dem parallelen scandir-Sammeln."""
+    workdir = tempfile.mkdtemp(prefix='md-bench-')
+    try:
+        trees = {}
+        if args.root:
+            trees['extern'] = args.root
+        else:
+            trees['tief'] = os.path.join(workdir, 'deep')
+            trees['breit'] = os.path.join(workdir, 'wide')
+            os.makedirs(trees['tief'])
+            os.makedirs(trees['breit'])
+            _make_deep_tree(trees['tief'], args.depth, args.files)
+            _make_wide_tree(trees['breit'], args.width, args.files)
+
+        for name, root in trees.items():
+            expected = _legacy_collect(root)
+            baseline = _best_of(lambda: _legacy_collect(root), args.repeat)
+            print(f"{name}: {len(expected):,} Dateien")
+            print(f"  os.walk:            {baseline * 1000:9.1f} ms")
+
+            for workers in args.workers:
+                if scan_markdown_tree(root, workers=workers) != expected:
+                    raise SystemExit(f"Reihenfolge weicht ab bei {workers} Threads")
+                elapsed = _best_of(lambda: scan_markdown_tree(root, workers=workers), args.repeat)
+                print(f"  scandir {workers:2d} Threads: {elapsed * 1000:9.1f} ms  "
+                      f"(x{baseline / elapsed:.2f})")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def _synthetic_paths(count: int, per_dir: int) -> Iterator[str]:
+    """Sortierte Pfade eines tiefen Dokumentationsbaums, ohne Dateien anzulegen."""
+    for number in range(count):
+        directory, page = divmod(number, per_dir)
+        project, section = divmod(directory, 100)
+        yield (f"/srv/documentation/projects/project-{project:05d}/"
+               f"sections/section-{section:03d}/page-{page:05d}.md")
+
+
+def _retained_bytes(build: Callable) -> tuple:
+    """Vom Ergebnis von build belegter Speicher (tracemalloc) und das Ergebnis selbst."""
+    tracemalloc.start()
+    try:
+        result = build()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained, result
+
+
+def _peak_bytes(build: Callable) -> tuple:
+    """Höchster während build belegter Speicher (tracemalloc) und das Ergebnis."""
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def _make_empty_tree(root: str, count: int, per_dir: int):
+    """Legt count leere .md Dateien in der Struktur von _synthetic_paths an."""
+    for number in range(count):
+        directory, page = divmod(number, per_dir)
+        project, section = divmod(directory, 100)
+        path = os.path.join(root, f'project-{project:05d}', 'sections', f'section-{section:03d}')
+        if page == 0:
+            os.makedirs(path)
+        open(os.path.join(path, f'page-{page:05d}.md'), 'w').close()
+
+
+def bench_fileset(args):
+    """Vergleicht den Speicherbedarf der Dateiliste: Pfadlisten, FileRecords, FileSet, Suche."""
+    _bench_fileset_retained(args)
+    _bench_discovery_peak(args)
+
+
+def _bench_discovery_peak(args):
+    """Spitzenbedarf der Suche selbst auf einem echten Baum, nicht nur des fertigen Ergebnisses."""
+    workdir = tempfile.mkdtemp(prefix='md-bench-', dir=args.tmpdir)
+    try:
+        root = args.root
+        if not root:
+            root = os.path.join(workdir, 'tree')
+            _make_empty_tree(root, args.tree_files, args.per_dir)
+
+        variants = [
+            ('os.walk + sortierte Kopie', lambda: sorted(_legacy_collect(root))),
+            ('discover_markdown_files', lambda: discover_markdown_files(root)),
+            ('discover (1 Thread)', lambda: discover_markdown_files(root, workers=1)),
+        ]
+
+        print(f"Suche in {root}")
+        baseline = None
+        for name, build in variants:
+            started = time.perf_counter()
+            peak, result = _peak_bytes(build)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or peak
+            print(f"  {name:28s} Spitze {peak / 1024 ** 2:9.1f} MB  {peak / max(len(result), 1):6.1f} B/Datei  "
+                  f"(x{baseline / peak:.2f}, {elapsed:.1f} s)")
+            del result
+    finally:
+        shutil.rmtree(workdir)
+
+
+def _bench_fileset_retained(args):
+    """Vom fertigen Ergebnis belegter Speicher bei synthetischen Pfaden."""
+    count = args.files
+
+    def records():
+        for path in _synthetic_paths(count, args.per_dir):
+            yield FileRecord(path, 4096, 1_700_000_000_000_000_000, 0o100644, 1, 1)
+
+    def legacy():
+        # collect_md_files_from_directory und die sortierte Kopie aus validate_input_files
+        collected = list(_synthetic_paths(count, args.per_dir))
+        return collected, sorted(collected)
+
+    variants = [
+        ('List[str] + sortierte Kopie', legacy),
+        ('List[FileRecord]', lambda: list(records())),
+        ('FileSet', lambda: FileSet.from_records(records())),
+    ]
+
+    print(f"{count:,} Dateien, {args.per_dir} pro Verzeichnis")
+    baseline = None
+    for name, build in variants:
+        started = time.perf_counter()
+        retained, result = _retained_bytes(build)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or retained
+        print(f"  {name:28s} {retained / 1024 ** 2:9.1f} MB  {retained / count:6.1f} B/Datei  "
+              f"(x{baseline / retained:.2f}, {elapsed:.1f} s)")
+        if isinstance(result, FileSet) and [record.path for record in result] != legacy()[1]:
+            raise SystemExit("Reihenfolge oder Pfade des FileSet weichen ab")
+        del result
+
+
+def _make_markdown_documents(count: int, sections: int) -> List[bytes]:
+    """Dokumente mit CRLF-Zeilenenden, wiederkehrenden Überschriften und Code-Blöcken."""
+    documents = []
+    for number in range(count):
+        lines = [f"# Dokument {number}", ""]
+        for section in range(sections):
+            lines += [f"## Abschnitt {section % 7}", ""]
+            lines += ["Fließtext mit etwas Länge, damit die Zeilen realistisch sind. " * 2] * 8
+            lines += ["", "```python", "# Kommentar, keine Überschrift", f"wert = {section}", "```", ""]
+        documents.append("\r\n".join(lines).encode('utf-8'))
+    return documents
+
+
+def bench_transform(args):
+    """Vergleicht die vereinigte Zeilen-Umwandlung mit einzelnen Durchgängen pro Option."""
+    documents = _make_markdown_documents(args.files, args.sections)
+    total = sum(len(document) for document in documents)
+    options = TransformOptions(line_ending='\r\n', remove_duplicate_headers=True)
+
+    def separate() -> str:
+        # Eine Kopie pro Option: vereinheitlichen, Überschriften filtern, Zeilenenden setzen
+        dedup = LineTransform(TransformOptions(remove_duplicate_headers=True))
+        digest = hashlib.blake2b()
+        for document in documents:
+            text = document.decode('utf-8')
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            text = dedup.apply(text)
+            text = text.replace('\n', '\r\n')
+            digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def fused() -> str:
+        # Vereinheitlicht wird beim Dekodieren, alles Weitere in einem Durchgang
+        transform = LineTransform(options)
+        digest = hashlib.blake2b()
+        for document in documents:
+            text = io.TextIOWrapper(io.BytesIO(document), encoding='utf-8').read()
+            digest.update(transform.apply(text).encode('utf-8'))
+        return digest.hexdigest()
+
+    def identity() -> str:
+        digest = hashlib.blake2b()
+        for document in documents:
+            digest.update(io.TextIOWrapper(io.BytesIO(document), encoding='utf-8').read().encode('utf-8'))
+        return digest.hexdigest()
+
+    print(f"{args.files:,} Dokumente, {total / 1024 ** 2:.1f} MB")
+    reference = None
+    baseline = None
+    for name, func in [('Einzelne Durchgänge', separate), ('Vereinigt', fused),
+                       ('Ohne Umwandlung (Identität)', identity)]:
+        result = func()
+        elapsed = _best_of(func, args.repeat)
+        baseline = baseline or elapsed
+        reference = reference or result
+        status = '' if result == reference or func is identity else '  (ABWEICHUNG!)'
+        print(f"  {name:30s} {elapsed:7.2f} s  {total / elapsed / 1024 ** 2:8.1f} MB/s  "
+              f"(x{baseline / elapsed:.2f}){status}")
+
+
+def _synthetic_headings(count: int, unique: int) -> Iterator[str]:
+    """Überschriften-Zeilen wie aus realen Dokumenten; nach unique verschiedenen wiederholen sie sich."""
+    for number in range(count):
+        key = number % unique
+        yield f"{'#' * (2 + key % 3)} Abschnitt {key}: Konfiguration und Beispiele"
+
+
+def bench_headings(args):
+    """Vergleicht set[str] mit Hash64Set für remove_duplicate_headers: Speicher und Durchsatz."""
+    count = args.headings
+    unique = max(1, int(count * args.unique))
+
+    def python_set(headings: Iterable[str]) -> set:
+        seen = set()
+        for heading in headings:
+            if heading not in seen:
+                seen.add(heading)
+        return seen
+
+    def hash_set(verify: bool) -> Callable:
+        def build(headings: Iterable[str]) -> Hash64Set:
+            seen = Hash64Set(verify=verify)
+            for heading in headings:
+                seen.add(heading)
+            return seen
+        return build
+
+    variants = [
+        ('set[str]', python_set),
+        ('Hash64Set', hash_set(False)),
+        ('Hash64Set (verify)', hash_set(True)),
+    ]
+
+    headings = list(_synthetic_headings(count, unique))
+    total = sum(len(heading.encode('utf-8')) + 1 for heading in headings)
+    print(f"{count:,} Überschriften, davon {unique:,} verschieden, {total / 1024 ** 2:.1f} MB")
+    baseline_memory = baseline_time = None
+    for name, build in variants:
+        # Speicher: die Zeichenketten entstehen erst beim Einfügen und gehören nur der Menge
+        retained, result = _retained_bytes(lambda: build(_synthetic_headings(count, unique)))
+        if len(result) != unique:
+            raise SystemExit(f"{name}: {len(result):,} statt {unique:,} Einträge")
+        del result
+        elapsed = _best_of(lambda: build(headings), args.repeat)
+        baseline_memory = baseline_memory or retained
+        baseline_time = baseline_time or elapsed
+        print(f"  {name:20s} {retained / 1024 ** 2:8.1f} MB  {retained / unique * 1e6 / 1024 ** 2:7.1f} MB/Mio.  "
+              f"(x{baseline_memory / retained:.2f})  {total / elapsed / 1024 ** 2:7.1f} MB/s  "
+              f"(x{baseline_time / elapsed:.2f})")
+
+
+def main():
+    """Hauptfunktion der Benchmarks."""
+
+    parser = argparse.ArgumentParser(description='Benchmarks für MD-Merger.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    discovery = subparsers.add_parser('discovery', help='Verzeichnissuche: os.walk gegen scandir-Threads')
+    discovery.add_argument('--root', help='Vorhandenen Baum messen (z. B. auf NFS) statt synthetische Bäume')
+    discovery.add_argument('--depth', type=int, default=200, help='Tiefe des tiefen Baums')
+    discovery.add_argument('--width', type=int, default=60, help='Breite pro Ebene des breiten Baums')
+    discovery.add_argument('--files', type=int, default=5, help='Dateien pro Verzeichnis')
+    discovery.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    discovery.add_argument('--repeat', type=int, default=3)
+    discovery.set_defaults(func=bench_discovery)
+
+    memory = subparsers.add_parser('memory', help='Spitzen-RSS beim Zusammenfügen von 1 KB bis 4 GB')
+    memory.add_argument('--sizes', nargs='+', default=['1K', '1M', '64M', '512M', '4G'])
+    memory.add_argument('--buffer-size', type=int, default=1024 * 1024)
+    memory.add_argument('--legacy-max', default='512M', help='Größte Eingabe, die auch mit read() gemessen wird')
+    memory.add_argument('--tmpdir', help='Verzeichnis für die Testdateien (braucht Platz für die größte Eingabe x2)')
+    memory.set_defaults(func=bench_memory)
+
+    zerocopy = subparsers.add_parser('zerocopy', help='Dekodieren/Kodieren gegen kernelseitiges Kopieren')
+    zerocopy.add_argument('--total', default='1G', help='Gesamtgröße des Korpus, z. B. 10G')
+    zerocopy.add_argument('--file-size', default='8M', help='Größe der einzelnen Dateien')
+    zerocopy.add_argument('--repeat', type=int, default=1)
+    zerocopy.add_argument('--tmpdir', help='Verzeichnis für Korpus und Ausgabe (braucht Platz für die Gesamtgröße x2)')
+    zerocopy.set_defaults(func=bench_zerocopy)
+
+    fsync = subparsers.add_parser('fsync', help='Kosten der fsync-Strategien beim atomaren Schreiben')
+    fsync.add_argument('--total', default='64M', help='Gesamtgröße des Korpus')
+    fsync.add_argument('--file-size', default='64K', help='Größe der einzelnen Dateien')
+    fsync.add_argument('--write-buffer', type=int, default=1024 * 1024)
+    fsync.add_argument('--repeat', type=int, default=5)
+    fsync.add_argument('--tmpdir', help='Verzeichnis auf dem zu messenden Datenträger (Standard: System-Temp)')
+    fsync.set_defaults(func=bench_fsync)
+
+    coalesce = subparsers.add_parser('coalesce', help='Aufwand pro Datei bei sehr vielen kleinen Dateien')
+    coalesce.add_argument('--files', type=int, default=500000, help='Anzahl der Dateien')
+    coalesce.add_argument('--file-size', default='200', help='Größe der einzelnen Dateien')
+    coalesce.add_argument('--repeat', type=int, default=3)
+    coalesce.add_argument('--tmpdir', help='Verzeichnis für den Korpus (Standard: System-Temp)')
+    coalesce.set_defaults(func=bench_coalesce)
+
+    timestamps = subparsers.add_parser('timestamps', help='Kosten der Zeitstempel pro Datei im Merge')
+    timestamps.add_argument('--files', type=int, default=500000, help='Anzahl der Dateien')
+    timestamps.add_argument('--file-size', default='200', help='Größe der einzelnen Dateien')
+    timestamps.add_argument('--repeat', type=int, default=3)
+    timestamps.add_argument('--tmpdir', help='Verzeichnis für den Korpus (Standard: System-Temp)')
+    timestamps.set_defaults(func=bench_timestamps)
+
+    fileset = subparsers.add_parser('fileset', help='Speicherbedarf der Dateiliste bei Millionen Dateien')
+    fileset.add_argument('--files', type=int, default=2000000, help='Anzahl der Dateien')
+    fileset.add_argument('--per-dir', type=int, default=50, help='Dateien pro Verzeichnis')
+    fileset.add_argument('--tree-files', type=int, default=200000,
+                         help='Anzahl der (leeren) Dateien im Baum für die Spitze der Suche')
+    fileset.add_argument('--root', help='Vorhandenes Verzeichnis statt des erzeugten Baums durchsuchen')
+    fileset.add_argument('--tmpdir', help='Verzeichnis für den erzeugten Baum (Standard: System-Temp)')
+    fileset.set_defaults(func=bench_fileset)
+
+    transform = subparsers.add_parser('transform', help='Vereinigte Zeilen-Umwandlung gegen einzelne Durchgänge')
+    transform.add_argument('--files', type=int, default=1000, help='Anzahl der Dokumente')
+    transform.add_argument('--sections', type=int, default=50, help='Abschnitte pro Dokument')
+    transform.add_argument('--repeat', type=int, default=3)
+    transform.set_defaults(func=bench_transform)
+
+    headings = subparsers.add_parser('headings', help='Speicher und Durchsatz der Menge gesehener Überschriften')
+    headings.add_argument('--headings', type=int, default=2000000, help='Anzahl der Überschriften')
+    headings.add_argument('--unique', type=float, default=0.5, help='Anteil verschiedener Überschriften')
+    headings.add_argument('--repeat', type=int, default=3)
+    headings.set_defaults(func=bench_headings)
+
+    merge_rss = subparsers.add_parser('_merge-rss')
+    merge_rss.add_argument('mode', choices=['stream', 'legacy'])
+    merge_rss.add_argument('files', nargs='+')
+    merge_rss.add_argument('-o', '--output', required=True)
+    merge_rss.add_argument('--buffer-size', type=int, default=1024 * 1024)
+    merge_rss.set_defaults(func=bench_merge_rss)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,7 +28,8 @@ class MergerConfig:
             'processing': {
                 'skip_empty_files': True,
                 'normalize_line_endings': True,
-                'remove_duplicate_headers': False
+                'remove_duplicate_headers': False,
+                'verify_duplicate_headers': False
             },
             'separators': {
                 'between_files': '---',
@@ -36,7 +37,7 @@ class MergerConfig:
                 'header_format': '<!-- Quelle: {filepath} -->'
             },
             'filters': {
-                'exclude_patterns': ['.git', '__pycache__', '.DS_Store'],
+                'exclude_patterns': ['.git', '__pycache__', '.DS_Store', 'node_modules'],
                 'include_only': ['.md'],
                 'max_file_size_mb': 10
             }
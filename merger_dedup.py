@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Erkennung inhaltsgleicher Quelldateien für MD-Merger
+"""
+
+import os
+import hashlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from merger_discovery import FileRecord
+
+# Umgang mit inhaltsgleichen Dateien: behalten, weglassen oder durch einen Verweis ersetzen
+DEDUP_MODES = ('off', 'skip', 'reference')
+
+DEFAULT_DEDUP_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+# Blockgröße beim Hashen
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Verweis, der bei 'reference' statt des Inhalts eines Duplikats steht
+REFERENCE_PREFIX = b'<!-- Duplikat von: '
+REFERENCE_SUFFIX = b' -->'
+
+
+def reference_line(reference: str) -> bytes:
+    """Verweiszeile auf das erste Vorkommen, ohne Zeilenende."""
+    return REFERENCE_PREFIX + reference.encode('utf-8') + REFERENCE_SUFFIX
+
+
+def hash_file(path: str) -> Optional[str]:
+    """Prüfsumme einer Datei (blake2b); hashlib gibt dabei die GIL frei."""
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb', buffering=0) as file:
+            buffer = bytearray(HASH_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                n = file.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def find_duplicates(records: Iterable[FileRecord], workers: int = DEFAULT_DEDUP_WORKERS) -> Dict[str, str]:
+    """
+    Findet Dateien, deren Inhalt Byte für Byte einer früheren Datei gleicht.
+
+    Gehasht werden nur Dateien, deren Größe mehrfach vorkommt; alle anderen
+    können keine Duplikate haben. Leere Dateien werden ohnehin übersprungen
+    und nicht berücksichtigt. Die Eingabe wird zweimal durchlaufen (zuerst
+    nur die Größen), sodass nur die Kandidaten im Speicher gehalten werden.
+
+    Args:
+        records: FileRecords in Ausgabereihenfolge (z. B. ein FileSet)
+        workers: Anzahl der Threads zum Hashen
+
+    Returns:
+        Zuordnung Pfad des Duplikats → Pfad des ersten Vorkommens
+    """
+    size_counts = Counter(record.size for record in records)
+    # Kandidaten in Ausgabereihenfolge: das erste Vorkommen steht immer vorn
+    candidates = [record for record in records if record.size > 0 and size_counts[record.size] > 1]
+    if not candidates:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='md-hash') as pool:
+        digests = list(pool.map(hash_file, (record.path for record in candidates)))
+
+    by_content: Dict[tuple, List[str]] = defaultdict(list)
+    for record, digest in zip(candidates, digests):
+        if digest is not None:
+            by_content[(record.size, digest)].append(record.path)
+
+    duplicates = {}
+    for paths in by_content.values():
+        for path in paths[1:]:
+            duplicates[path] = paths[0]
+    return duplicates
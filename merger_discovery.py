@@ -0,0 +1,880 @@
+#!/usr/bin/env python3
+"""
+Paralleles Sammeln von Markdown-Dateien für MD-Merger
+"""
+
+import os
+import array
+import fnmatch
+import json
+import queue
+import re
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from merger_output import write_json_atomic
+
+# Verzeichnislisten sind I/O-gebunden (besonders auf NFS), daher mehr Threads als Kerne
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+MANIFEST_VERSION = 2
+
+# Verzeichnisse, deren mtime so kurz vor dem Scan liegt, können sich noch in
+# derselben Zeitstempel-Granularität geändert haben und werden nicht zwischengespeichert
+RACY_MTIME_NS = 2 * 1_000_000_000
+
+
+class StatColumns:
+    """
+    stat-Daten der .md Dateien eines gelisteten Verzeichnisses.
+
+    Während der Suche sind die Listen aller Verzeichnisse gleichzeitig im
+    Speicher. Statt eines os.stat_result pro Datei (mit Gleitkomma-Zeiten und
+    allen übrigen Feldern) werden nur die Ganzzahlen gehalten, die FileSet
+    übernimmt.
+    """
+
+    def __init__(self):
+        # size, mtime_ns, mode je Datei; mode -1 = stat fehlgeschlagen
+        self._values = array.array('q')
+        # ino, dev je Datei
+        self._ids = array.array('Q')
+
+    def add(self, st: Optional[os.stat_result]):
+        """Hängt die Daten einer Datei an (None, falls stat fehlgeschlagen ist)."""
+        if st is None:
+            self._values.extend((0, 0, -1))
+            self._ids.extend((0, 0))
+        else:
+            self._values.extend((st.st_size, st.st_mtime_ns, st.st_mode))
+            self._ids.extend((st.st_ino, st.st_dev))
+
+    def get(self, index: int) -> Optional[Tuple[int, int, int, int, int]]:
+        """(size, mtime_ns, mode, ino, dev) der Datei an Position index, None ohne stat-Daten."""
+        size, mtime_ns, mode = self._values[3 * index:3 * index + 3]
+        if mode < 0:
+            return None
+        return size, mtime_ns, mode, self._ids[2 * index], self._ids[2 * index + 1]
+
+
+def _stat_columns(entries: List[Tuple[str, Optional[os.stat_result]]]) -> Tuple[List[str], StatColumns]:
+    """Teilt sortierte (Name, stat)-Paare in Namen und StatColumns auf."""
+    names = []
+    columns = StatColumns()
+    for name, st in entries:
+        names.append(name)
+        columns.add(st)
+    return names, columns
+
+
+class DirListing(NamedTuple):
+    """Ergebnis des Listens eines Verzeichnisses."""
+    files: List[str]
+    dirs: List[str]
+    mtime_ns: Optional[int] = None
+    pruned_dirs: int = 0
+    pruned_entries: int = 0
+    # (st_dev, st_ino) je Unterverzeichnis, nur beim Folgen symbolischer Links
+    dir_ids: Optional[List[Tuple[int, int]]] = None
+    # stat-Daten zu files, nur beim Listen mit stat
+    stats: Optional[StatColumns] = None
+
+
+class ScanStats:
+    """Statistiken einer Verzeichnissuche."""
+
+    def __init__(self):
+        self.listed_dirs = 0
+        self.reused_dirs = 0
+        self.pruned_dirs = 0
+        self.pruned_entries = 0
+        self.duplicate_dirs = 0
+        self.symlink_loops = 0
+        self.duplicate_files = 0
+
+    def add_listings(self, listings: Iterable[DirListing]):
+        """Summiert die Ausschluss-Zähler aller gelisteten Verzeichnisse."""
+        for listing in listings:
+            self.pruned_dirs += listing.pruned_dirs
+            self.pruned_entries += listing.pruned_entries
+
+
+class ExcludeMatcher:
+    """
+    Ausschlussmuster aus filters.exclude_patterns, einmalig kompiliert.
+
+    Muster ohne Präfix sind Glob-Muster (fnmatch, Groß-/Kleinschreibung
+    beachtend), Muster mit dem Präfix 're:' reguläre Ausdrücke. Beide müssen
+    den ganzen Namen treffen. Muster ohne '/' werden mit dem Eintragsnamen
+    verglichen, Muster mit '/' mit dem Pfad relativ zum durchsuchten Verzeichnis.
+    Alle Muster einer Art werden zu einem einzigen regulären Ausdruck zusammengefasst.
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        Args:
+            patterns: Muster aus filters.exclude_patterns
+
+        Raises:
+            ValueError: Bei einem ungültigen regulären Ausdruck
+        """
+        self.patterns = list(patterns)
+
+        name_parts = []
+        path_parts = []
+        for pattern in self.patterns:
+            if pattern.startswith('re:'):
+                regex = pattern[3:]
+                try:
+                    re.compile(regex)
+                except re.error as e:
+                    raise ValueError(f"Ungültiges Muster in filters.exclude_patterns: {pattern!r} ({e})") from None
+            else:
+                regex = fnmatch.translate(pattern)
+
+            if '/' in pattern:
+                path_parts.append(regex)
+            else:
+                name_parts.append(regex)
+
+        self._name_regex = self._compile(name_parts)
+        self._path_regex = self._compile(path_parts)
+
+    @classmethod
+    def from_config(cls, config) -> 'ExcludeMatcher':
+        """
+        Liest filters.exclude_patterns aus einer MergerConfig.
+
+        Ein leerer Schlüssel bedeutet keine Muster, ein einzelnes Muster darf
+        auch ohne Liste angegeben werden.
+
+        Raises:
+            ValueError: Wenn der Wert keine Liste von Zeichenketten ist oder ein
+                Muster ungültig ist
+        """
+        patterns = config.get('filters.exclude_patterns') or []
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+            raise ValueError(f"Ungültiges filters.exclude_patterns: {patterns!r} "
+                             f"(erwartet: Liste von Mustern)")
+        return cls(patterns)
+
+    @staticmethod
+    def _compile(parts: List[str]) -> Optional['re.Pattern']:
+        """Fasst mehrere Ausdrücke zu einer Alternative zusammen."""
+        if not parts:
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{part})' for part in parts))
+        except re.error as e:
+            # Einzeln gültige Ausdrücke, die sich nicht vereinen lassen (z. B. gleiche Gruppennamen)
+            raise ValueError(f"Muster in filters.exclude_patterns lassen sich nicht kombinieren: {e}") from None
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def excludes(self, name: str, rel_dir: str = '') -> bool:
+        """
+        Prüft, ob ein Verzeichniseintrag ausgeschlossen ist.
+
+        Args:
+            name: Name des Eintrags
+            rel_dir: Pfad des enthaltenden Verzeichnisses relativ zum Suchstart
+
+        Returns:
+            True, wenn ein Muster trifft
+        """
+        if self._name_regex is not None and self._name_regex.fullmatch(name):
+            return True
+
+        if self._path_regex is not None:
+            rel_path = f'{rel_dir}/{name}' if rel_dir else name
+            return self._path_regex.fullmatch(rel_path.replace(os.sep, '/')) is not None
+
+        return False
+
+
+def _relative_to(directory: str) -> Callable[[str], str]:
+    """Liefert eine Funktion, die gelistete Pfade relativ zum Suchstart macht."""
+    prefix_length = len(os.path.join(directory, ''))
+
+    def relative(path: str) -> str:
+        return path[prefix_length:] if path != directory else ''
+
+    return relative
+
+
+def _list_directory(path: str, with_stat: bool = False, exclude: Optional[ExcludeMatcher] = None,
+                    rel_dir: str = '', follow_symlinks: bool = False) -> DirListing:
+    """
+    Listet ein einzelnes Verzeichnis mit os.scandir.
+
+    Verhält sich wie os.walk ohne followlinks: symbolische Links auf
+    Verzeichnisse werden nicht betreten, nicht lesbare Verzeichnisse
+    werden stillschweigend übersprungen. Mit follow_symlinks werden auch
+    verlinkte Verzeichnisse geliefert, zusammen mit (st_dev, st_ino) jedes
+    Unterverzeichnisses, damit der Aufrufer Mehrfachbesuche erkennt.
+
+    Args:
+        path: Pfad zum Verzeichnis
+        with_stat: Zu den .md Dateien die stat-Daten der DirEntries als
+            StatColumns mitliefern
+        exclude: Ausschlussmuster; getroffene Verzeichnisse werden nicht betreten
+        rel_dir: Pfad des Verzeichnisses relativ zum Suchstart (für Pfadmuster)
+        follow_symlinks: Symbolischen Links auf Verzeichnisse folgen
+
+    Returns:
+        Markdown-Dateinamen und Unterverzeichnisnamen, jeweils nach
+        ASCII-Codes sortiert
+    """
+    files = []
+    dirs = []
+    dir_ids = {}
+    pruned_dirs = 0
+    pruned_entries = 0
+
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if exclude and exclude.excludes(entry.name, rel_dir):
+                    if is_dir:
+                        pruned_dirs += 1
+                    else:
+                        pruned_entries += 1
+                    continue
+
+                if is_dir:
+                    if follow_symlinks:
+                        try:
+                            # stat() folgt dem Link und liefert das Zielverzeichnis
+                            target = entry.stat()
+                        except OSError:
+                            continue
+                        dirs.append(entry.name)
+                        dir_ids[entry.name] = (target.st_dev, target.st_ino)
+                    elif not entry.is_symlink():
+                        dirs.append(entry.name)
+                elif entry.name.lower().endswith('.md'):
+                    if with_stat:
+                        try:
+                            files.append((entry.name, entry.stat()))
+                        except OSError:
+                            files.append((entry.name, None))
+                    else:
+                        files.append(entry.name)
+    except OSError:
+        return DirListing([], [])
+
+    files.sort()
+    dirs.sort()
+    columns = None
+    if with_stat:
+        # Die stat-Ergebnisse dieses einen Verzeichnisses werden hier schon wieder freigegeben
+        files, columns = _stat_columns(files)
+    return DirListing(files, dirs, pruned_dirs=pruned_dirs, pruned_entries=pruned_entries,
+                      dir_ids=[dir_ids[name] for name in dirs] if follow_symlinks else None,
+                      stats=columns)
+
+
+def _make_lister(directory: str, with_stat: bool, exclude: Optional[ExcludeMatcher],
+                 follow_symlinks: bool = False) -> Callable[[str], DirListing]:
+    """Bindet die Optionen für _list_directory an einen Suchstart."""
+    relative = _relative_to(directory)
+
+    def lister(path: str) -> DirListing:
+        return _list_directory(path, with_stat, exclude, relative(path) if exclude else '', follow_symlinks)
+
+    return lister
+
+
+def _scan_serial(directory: str, lister: Callable[[str], DirListing]) -> Dict[str, DirListing]:
+    """Listet alle Verzeichnisse nacheinander im aktuellen Thread."""
+    listings = {}
+    stack = [directory]
+
+    while stack:
+        path = stack.pop()
+        listing = lister(path)
+        listings[path] = listing
+        stack.extend(os.path.join(path, name) for name in listing.dirs)
+
+    return listings
+
+
+def _scan_parallel(directory: str, lister: Callable[[str], DirListing],
+                   workers: int) -> Dict[str, DirListing]:
+    """
+    Listet alle Verzeichnisse über einen begrenzten Thread-Pool.
+
+    Jedes gelistete Verzeichnis reicht seine Unterverzeichnisse sofort als
+    neue Aufträge ein; der aufrufende Thread sammelt nur die Ergebnisse ein.
+    """
+    listings = {}
+    results = queue.SimpleQueue()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='md-scan') as pool:
+        def submit(path: str):
+            future = pool.submit(lister, path)
+            future.add_done_callback(lambda done, path=path: results.put((path, done)))
+
+        submit(directory)
+        outstanding = 1
+
+        while outstanding:
+            path, future = results.get()
+            outstanding -= 1
+
+            listing = future.result()
+            listings[path] = listing
+
+            for name in listing.dirs:
+                submit(os.path.join(path, name))
+                outstanding += 1
+
+    return listings
+
+
+def _scan_following(directory: str, lister: Callable[[str], DirListing], workers: int,
+                    stats: Optional[ScanStats] = None) -> Dict[str, DirListing]:
+    """
+    Listet den Baum und folgt dabei symbolischen Links auf Verzeichnisse.
+
+    Jedes physische Verzeichnis (st_dev, st_ino) wird nur einmal betreten.
+    Gelistet wird Ebene für Ebene (innerhalb einer Ebene parallel), und die
+    Ergebnisse werden in fester Reihenfolge ausgewertet: ein mehrfach
+    erreichbares Verzeichnis erscheint daher immer unter seinem kürzesten,
+    bei gleicher Tiefe unter seinem zuerst gelisteten Pfad. Links auf ein
+    übergeordnetes Verzeichnis (Schleifen) werden gemeldet und übersprungen.
+    """
+    listings = {}
+    try:
+        root_stat = os.stat(directory)
+    except OSError:
+        return {directory: DirListing([], [])}
+
+    visited = {(root_stat.st_dev, root_stat.st_ino)}
+    ids = {directory: (root_stat.st_dev, root_stat.st_ino)}
+
+    def is_ancestor(path: str, dir_id: Tuple[int, int]) -> bool:
+        while path in ids:
+            if ids[path] == dir_id:
+                return True
+            path = os.path.dirname(path)
+        return False
+
+    level = [directory]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='md-scan') as pool:
+        while level:
+            next_level = []
+            for path, listing in zip(level, pool.map(lister, level)):
+                dirs = []
+                for name, dir_id in zip(listing.dirs, listing.dir_ids or []):
+                    child = os.path.join(path, name)
+                    if dir_id in visited:
+                        if is_ancestor(path, dir_id):
+                            print(f"Warnung: Symbolischer Link '{child}' führt zurück in ein übergeordnetes "
+                                  f"Verzeichnis und wird übersprungen.", file=sys.stderr)
+                            if stats is not None:
+                                stats.symlink_loops += 1
+                        elif stats is not None:
+                            stats.duplicate_dirs += 1
+                        continue
+                    visited.add(dir_id)
+                    ids[child] = dir_id
+                    dirs.append(name)
+                    next_level.append(child)
+                listings[path] = listing._replace(dirs=dirs)
+            level = next_level
+
+    return listings
+
+
+def _scan(directory: str, lister: Callable[[str], DirListing], workers: int) -> Dict[str, DirListing]:
+    """Listet den ganzen Baum seriell oder parallel."""
+    if workers <= 1:
+        return _scan_serial(directory, lister)
+    return _scan_parallel(directory, lister, workers)
+
+
+def scan_markdown_tree(directory: str, workers: int = DEFAULT_SCAN_WORKERS,
+                       exclude: Optional[ExcludeMatcher] = None) -> List[str]:
+    """
+    Sammelt rekursiv alle .md Dateien aus einem Verzeichnis.
+
+    Die Verzeichnisse werden parallel gelistet; die Ergebnisliste hat
+    trotzdem exakt die Reihenfolge eines sortierten os.walk: zuerst die
+    sortierten Dateien eines Verzeichnisses, dann nacheinander die
+    sortierten Unterverzeichnisse.
+
+    Args:
+        directory: Pfad zum Verzeichnis
+        workers: Anzahl der Threads zum Listen (1 = seriell)
+        exclude: Optionale Ausschlussmuster, die schon beim Durchsuchen greifen
+
+    Returns:
+        Liste der Markdown-Dateipfade, sortiert nach ASCII-Codes
+    """
+    listings = _scan(directory, _make_lister(directory, False, exclude), workers)
+
+    md_files = []
+    stack = [directory]
+
+    while stack:
+        path = stack.pop()
+        listing = listings.pop(path)
+        md_files.extend(os.path.join(path, name) for name in listing.files)
+        stack.extend(os.path.join(path, name) for name in reversed(listing.dirs))
+
+    return md_files
+
+
+class FileRecord(NamedTuple):
+    """
+    Eine gültige Markdown-Datei mit den stat-Daten aus der Suche.
+
+    Alle späteren Schritte (Filter, Zeitstempel, Statistiken) verwenden
+    diese Daten, statt die Datei erneut abzufragen.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    mode: int
+    ino: int
+    dev: int
+
+    @classmethod
+    def from_stat(cls, path: str, st: os.stat_result) -> 'FileRecord':
+        """Erzeugt einen Eintrag aus einem stat-Ergebnis."""
+        return cls(path, st.st_size, st.st_mtime_ns, st.st_mode, st.st_ino, st.st_dev)
+
+
+class FileSet:
+    """
+    Kompakte, unveränderliche Liste von Dateien in ASCII-Reihenfolge.
+
+    Statt eines vollständigen Pfads pro Datei werden eine Tabelle der
+    Verzeichnisse (mit abschließendem Trenner) und je Datei der Index ihres
+    Verzeichnisses, ihr (internierter) Name und die stat-Daten in Arrays
+    gehalten. Bei Millionen von Dateien entfallen so die immer gleichen
+    Verzeichnispräfixe. Der Zugriff per Index liefert einen FileRecord mit
+    dem auf Abruf zusammengesetzten Pfad, sodass FileSet überall dort
+    verwendet werden kann, wo eine Liste von FileRecords erwartet wird.
+    """
+
+    def __init__(self, dirs: Optional[List[str]] = None):
+        """
+        Args:
+            dirs: Gemeinsam genutzte Verzeichnistabelle (für Teilmengen)
+        """
+        self._dirs: List[str] = dirs if dirs is not None else []
+        self._dir_index = array.array('I')
+        self._names: List[str] = []
+        self._size = array.array('q')
+        self._mtime_ns = array.array('q')
+        self._mode = array.array('I')
+        self._ino = array.array('Q')
+        self._dev = array.array('Q')
+
+    @classmethod
+    def from_records(cls, records: Iterable[FileRecord]) -> 'FileSet':
+        """Übernimmt bereits sortierte FileRecords."""
+        file_set = cls()
+        dir_numbers: Dict[str, int] = {}
+        for record in records:
+            # Exakt am letzten Trenner teilen, damit der Pfad unverändert zurückkommt
+            split = record.path.rfind(os.sep) + 1
+            prefix = record.path[:split]
+            number = dir_numbers.get(prefix)
+            if number is None:
+                number = dir_numbers[prefix] = file_set.add_dir(prefix)
+            file_set.append(number, record.path[split:], record.size, record.mtime_ns,
+                            record.mode, record.ino, record.dev)
+        return file_set
+
+    def add_dir(self, prefix: str) -> int:
+        """Nimmt ein Verzeichnis (Pfad mit abschließendem Trenner) auf und liefert seine Nummer."""
+        self._dirs.append(prefix)
+        return len(self._dirs) - 1
+
+    def append(self, dir_number: int, name: str, size: int, mtime_ns: int, mode: int, ino: int, dev: int):
+        """Hängt eine Datei an; der Aufrufer sorgt für die ASCII-Reihenfolge."""
+        self._dir_index.append(dir_number)
+        self._names.append(sys.intern(name))
+        self._size.append(size)
+        self._mtime_ns.append(mtime_ns)
+        self._mode.append(mode)
+        self._ino.append(ino)
+        self._dev.append(dev)
+
+    def path(self, index: int) -> str:
+        """Vollständiger Pfad der Datei an Position index."""
+        return self._dirs[self._dir_index[index]] + self._names[index]
+
+    def select(self, indices: Iterable[int]) -> 'FileSet':
+        """Teilmenge der angegebenen Positionen (aufsteigend), mit derselben Verzeichnistabelle."""
+        subset = FileSet(self._dirs)
+        for index in indices:
+            subset.append(self._dir_index[index], self._names[index], self._size[index],
+                          self._mtime_ns[index], self._mode[index], self._ino[index], self._dev[index])
+        return subset
+
+    def total_size(self) -> int:
+        """Summe der Dateigrößen."""
+        return sum(self._size)
+
+    def latest_mtime_ns(self) -> int:
+        """Jüngste Änderungszeit (0 bei leerer Menge)."""
+        return max(self._mtime_ns, default=0)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[FileRecord, 'FileSet']:
+        if isinstance(index, slice):
+            return self.select(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        return FileRecord(self.path(index), self._size[index], self._mtime_ns[index],
+                          self._mode[index], self._ino[index], self._dev[index])
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _is_regular(path: str, mode: Optional[int]) -> bool:
+    """
+    Prüft eine Datei anhand des mode aus ihrem (einzigen) stat-Ergebnis.
+
+    Entspricht den Prüfungen von os.path.exists und os.path.isfile in
+    validate_input_files inklusive der Warnungen.
+
+    Args:
+        path: Pfad zur Datei
+        mode: st_mode oder None, falls stat fehlgeschlagen ist
+
+    Returns:
+        True bei einer regulären Datei
+    """
+    if mode is None:
+        print(f"Warnung: Datei '{path}' existiert nicht und wird übersprungen.", file=sys.stderr)
+        return False
+
+    if not stat.S_ISREG(mode):
+        print(f"Warnung: '{path}' ist keine Datei und wird übersprungen.", file=sys.stderr)
+        return False
+
+    return True
+
+
+def _check_candidate(path: str, st: Optional[os.stat_result]) -> Optional[FileRecord]:
+    """FileRecord einer regulären Datei aus ihrem stat-Ergebnis, sonst None (siehe _is_regular)."""
+    if not _is_regular(path, st.st_mode if st is not None else None):
+        return None
+    return FileRecord.from_stat(path, st)
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    """Führt genau einen stat-Aufruf aus und liefert None bei Fehlern."""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def stat_input_files(files: List[str]) -> FileSet:
+    """
+    Validiert Eingabedateien mit genau einem stat-Aufruf pro Datei.
+
+    Args:
+        files: Liste der zu validierenden Dateipfade
+
+    Returns:
+        Die gültigen Markdown-Dateien, sortiert nach ASCII-Codes
+    """
+    records = []
+
+    for file in files:
+        record = _check_candidate(file, _stat_or_none(file))
+        if record is None:
+            continue
+
+        if not file.lower().endswith('.md'):
+            print(f"Warnung: '{file}' ist keine Markdown-Datei und wird übersprungen.", file=sys.stderr)
+            continue
+
+        records.append(record)
+
+    records.sort(key=attrgetter('path'))
+    return FileSet.from_records(records)
+
+
+def split_oversized(records: FileSet, max_bytes: Optional[int]) -> Tuple[FileSet, FileSet]:
+    """
+    Trennt Dateien über dem Größenlimit ab, allein anhand der stat-Daten.
+
+    Args:
+        records: Einträge aus der Suche
+        max_bytes: Größenlimit in Bytes (None = unbegrenzt)
+
+    Returns:
+        Tupel aus (Dateien innerhalb des Limits, zu große Dateien)
+    """
+    if not max_bytes:
+        return records, FileSet()
+
+    within_limit = []
+    oversized = []
+    for index, record in enumerate(records):
+        (oversized if record.size > max_bytes else within_limit).append(index)
+
+    return records.select(within_limit), records.select(oversized)
+
+
+def unique_physical_files(records: FileSet, stats: Optional[ScanStats] = None) -> FileSet:
+    """
+    Behält von mehreren Pfaden auf dieselbe Datei (st_dev, st_ino) nur den ersten.
+
+    Symbolische Links und harte Links auf eine Datei würden sonst mehrfach
+    gelesen und geschrieben.
+
+    Args:
+        records: FileRecords in Ausgabereihenfolge
+        stats: Optionales Objekt, in dem die Anzahl weggelassener Pfade gezählt wird
+
+    Returns:
+        FileRecords ohne Mehrfachpfade, Reihenfolge unverändert
+    """
+    seen = set()
+    unique = []
+    for index, record in enumerate(records):
+        key = (record.dev, record.ino)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(index)
+
+    if stats is not None:
+        stats.duplicate_files += len(records) - len(unique)
+    return records.select(unique)
+
+
+def _records_from_listings(directory: str, listings: Dict[str, DirListing]) -> FileSet:
+    """
+    Wandelt gelistete Verzeichnisse in ein FileSet in ASCII-Reihenfolge um.
+
+    Statt alle vollständigen Pfade zu bilden und zu sortieren, werden in
+    jedem Verzeichnis Dateien und Unterverzeichnisse gemeinsam sortiert,
+    Unterverzeichnisse mit angehängtem Trenner als Schlüssel. Da Namen
+    keinen Trenner enthalten, ergibt die Tiefensuche in dieser Reihenfolge
+    genau die Reihenfolge der sortierten Pfade (wie validate_input_files,
+    mit denselben Warnungen). Abgearbeitete Listen werden sofort freigegeben.
+    """
+    file_set = FileSet()
+    stack: List[Any] = [directory]
+
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            listing = listings.pop(item, None)
+            if listing is None:
+                continue
+            prefix = os.path.join(item, '')
+            number = file_set.add_dir(prefix)
+            entries = [(name, (number, prefix, name, listing.stats, index))
+                       for index, name in enumerate(listing.files)]
+            entries.extend((name + os.sep, os.path.join(item, name)) for name in listing.dirs)
+            entries.sort(key=itemgetter(0))
+            stack.extend(value for _, value in reversed(entries))
+            continue
+
+        number, prefix, name, columns, index = item
+        values = columns.get(index)
+        if _is_regular(prefix + name, values[2] if values is not None else None):
+            file_set.append(number, name, *values)
+
+    return file_set
+
+
+class ScanManifest:
+    """
+    Persistentes Scan-Manifest für den Verzeichnismodus.
+
+    Speichert pro Verzeichnis dessen mtime und Einträge. Ein Verzeichnis mit unveränderter
+    mtime wird beim nächsten Lauf nicht erneut gelistet; seine Unterverzeichnisse
+    werden trotzdem einzeln geprüft, da sich deren Inhalt nicht auf die mtime
+    des Elternverzeichnisses auswirkt. Dateien werden immer mit einem einzelnen
+    stat geprüft, sodass geänderte oder verschwundene Linkziele erkannt werden.
+    """
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = manifest_file
+        self.dirs: Dict[str, Dict[str, Any]] = {}
+        self.exclude_patterns: List[str] = []
+
+    def load(self, directory: str, exclude: Optional[ExcludeMatcher] = None) -> bool:
+        """
+        Lädt das Manifest, sofern es zum angegebenen Verzeichnis und zu den
+        Ausschlussmustern passt.
+
+        Returns:
+            True, wenn ein verwendbares Manifest geladen wurde
+        """
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"Warnung: Scan-Manifest '{self.manifest_file}' konnte nicht gelesen werden: {e}", file=sys.stderr)
+            return False
+
+        if data.get('version') != MANIFEST_VERSION or data.get('root') != os.path.abspath(directory):
+            return False
+
+        # Zwischengespeicherte Listen sind bereits gefiltert und gelten nur für dieselben Muster
+        if data.get('exclude_patterns', []) != (exclude.patterns if exclude else []):
+            return False
+
+        self.dirs = data.get('dirs', {})
+        return True
+
+    def save(self, directory: str, scan_started_ns: int):
+        """Schreibt das Manifest atomar (siehe AtomicOutput)."""
+        # Verzeichnisse mit zu frischer mtime werden beim nächsten Lauf neu gelistet
+        trusted_dirs = {
+            rel: entry for rel, entry in self.dirs.items()
+            if entry['mtime_ns'] < scan_started_ns - RACY_MTIME_NS
+        }
+        data = {
+            'version': MANIFEST_VERSION,
+            'root': os.path.abspath(directory),
+            'scan_started_ns': scan_started_ns,
+            'exclude_patterns': self.exclude_patterns,
+            'dirs': trusted_dirs,
+        }
+
+        try:
+            write_json_atomic(self.manifest_file, data, separators=(',', ':'))
+        except OSError as e:
+            print(f"Warnung: Scan-Manifest '{self.manifest_file}' konnte nicht geschrieben werden: {e}", file=sys.stderr)
+
+    def scan(self, directory: str, workers: int = DEFAULT_SCAN_WORKERS,
+             exclude: Optional[ExcludeMatcher] = None, stats: Optional[ScanStats] = None) -> FileSet:
+        """
+        Sammelt alle gültigen .md Dateien und aktualisiert das Manifest im Speicher.
+
+        Das Ergebnis ist identisch mit collect_md_files_from_directory
+        gefolgt von validate_input_files.
+
+        Args:
+            directory: Pfad zum Verzeichnis
+            workers: Anzahl der Threads zum Listen (1 = seriell)
+            exclude: Optionale Ausschlussmuster
+            stats: Optionales Objekt für Scan-Statistiken
+
+        Returns:
+            Einträge der gültigen Markdown-Dateien, sortiert nach ASCII-Codes
+        """
+        relative = _relative_to(directory)
+        cached_dirs = self.dirs
+        reused = set()
+
+        def list_cached(path: str) -> DirListing:
+            try:
+                dir_mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                return DirListing([], [])
+
+            rel_dir = relative(path)
+            cached = cached_dirs.get(rel_dir)
+            if cached is None or cached['mtime_ns'] != dir_mtime_ns:
+                listing = _list_directory(path, True, exclude, rel_dir)
+                return listing._replace(mtime_ns=dir_mtime_ns)
+
+            reused.add(path)
+            files, columns = _stat_columns([(name, _stat_or_none(os.path.join(path, name)))
+                                            for name in cached['files']])
+            pruned_dirs, pruned_entries = cached['pruned']
+            return DirListing(files, cached['dirs'], dir_mtime_ns, pruned_dirs, pruned_entries, stats=columns)
+
+        listings = _scan(directory, list_cached, workers)
+        if stats is not None:
+            stats.reused_dirs += len(reused)
+            stats.listed_dirs += len(listings) - len(reused)
+            stats.add_listings(listings.values())
+
+        self.exclude_patterns = exclude.patterns if exclude else []
+        self.dirs = {
+            relative(path): {
+                'mtime_ns': listing.mtime_ns,
+                'files': listing.files,
+                'dirs': listing.dirs,
+                'pruned': [listing.pruned_dirs, listing.pruned_entries],
+            }
+            for path, listing in listings.items()
+            if listing.mtime_ns is not None
+        }
+
+        return _records_from_listings(directory, listings)
+
+
+def discover_markdown_files(directory: str, workers: int = DEFAULT_SCAN_WORKERS,
+                            manifest_file: Optional[str] = None,
+                            full_rescan: bool = False,
+                            exclude: Optional[ExcludeMatcher] = None,
+                            stats: Optional[ScanStats] = None,
+                            follow_symlinks: bool = False) -> FileSet:
+    """
+    Sammelt und validiert alle .md Dateien eines Verzeichnisses in einem Durchgang.
+
+    Ersetzt collect_md_files_from_directory gefolgt von validate_input_files:
+    jede Datei wird genau einmal per stat abgefragt (über den DirEntry bzw.
+    bei unveränderten Verzeichnissen aus dem Manifest direkt).
+
+    Args:
+        directory: Pfad zum Verzeichnis
+        workers: Anzahl der Threads zum Listen (1 = seriell)
+        manifest_file: Optionales Scan-Manifest für inkrementelles Durchsuchen
+        full_rescan: Manifest ignorieren und alles neu listen
+        exclude: Ausschlussmuster; getroffene Verzeichnisse werden gar nicht erst betreten
+        stats: Optionales Objekt für Scan-Statistiken (u. a. ausgeschlossene Einträge)
+        follow_symlinks: Symbolischen Links auf Verzeichnisse folgen (ohne
+            Manifest); jedes Verzeichnis und jede Datei wird nur einmal erfasst
+
+    Returns:
+        Einträge der gültigen Markdown-Dateien, sortiert nach ASCII-Codes
+    """
+    if follow_symlinks:
+        listings = _scan_following(directory, _make_lister(directory, True, exclude, True), workers, stats)
+        if stats is not None:
+            stats.listed_dirs += len(listings)
+            stats.add_listings(listings.values())
+        return unique_physical_files(_records_from_listings(directory, listings), stats)
+
+    if not manifest_file:
+        listings = _scan(directory, _make_lister(directory, True, exclude), workers)
+        if stats is not None:
+            stats.listed_dirs += len(listings)
+            stats.add_listings(listings.values())
+        return _records_from_listings(directory, listings)
+
+    manifest = ScanManifest(manifest_file)
+    if not full_rescan:
+        manifest.load(directory, exclude)
+
+    scan_started_ns = time.time_ns()
+    records = manifest.scan(directory, workers=workers, exclude=exclude, stats=stats)
+    manifest.save(directory, scan_started_ns)
+
+    return records
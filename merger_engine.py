@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Kopier-Strategien für MD-Merger
+"""
+
+import os
+import codecs
+import errno
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Fehler, bei denen ein Kernel-Kopierweg für dieses Dateipaar nicht verfügbar ist
+_UNSUPPORTED_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+# Einmal als nicht unterstützt erkannte Kopierwege werden für den Rest des Laufs übersprungen
+_copy_file_range_available = hasattr(os, 'copy_file_range')
+_sendfile_available = hasattr(os, 'sendfile')
+
+# Blockgröße für die gepufferte Ersatzkopie und die UTF-8-Prüfung
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Dateien bis zu dieser Größe werden gelesen und gebündelt geschrieben statt kernelseitig kopiert
+SMALL_FILE_SIZE = 64 * 1024
+
+
+def write_all(fd: int, data, offset: Optional[int] = None):
+    """Schreibt alle Bytes, an die aktuelle Position oder positionsgenau per pwrite."""
+    view = memoryview(data)
+    while view:
+        if offset is None:
+            written = os.write(fd, view)
+        else:
+            written = os.pwrite(fd, view, offset)
+            offset += written
+        view = view[written:]
+
+
+def _copy_buffered(src_fd: int, dst_fd: int, count: int, offset_src: int,
+                   offset_dst: Optional[int] = None) -> int:
+    """Kopiert über einen Puffer im Benutzerspeicher (letzte Rückfallebene)."""
+    copied = 0
+    while copied < count:
+        data = os.pread(src_fd, min(COPY_CHUNK_SIZE, count - copied), offset_src + copied)
+        if not data:
+            break
+        write_all(dst_fd, data, None if offset_dst is None else offset_dst + copied)
+        copied += len(data)
+    return copied
+
+
+def kernel_copy(src_fd: int, dst_fd: int, count: int, offset_src: int = 0,
+                offset_dst: Optional[int] = None) -> int:
+    """
+    Kopiert Bytes von einem Dateideskriptor in einen anderen.
+
+    Nutzt os.copy_file_range, bei Bedarf os.sendfile und zuletzt eine
+    gepufferte Kopie. Die Position von src_fd bleibt unverändert. Ohne
+    offset_dst wird an die aktuelle Position von dst_fd geschrieben, die
+    entsprechend vorrückt; mit offset_dst wird positionsgenau geschrieben
+    (dann ohne sendfile, das immer die Dateiposition verwendet).
+
+    Args:
+        src_fd: Quell-Dateideskriptor
+        dst_fd: Ziel-Dateideskriptor
+        count: Anzahl der zu kopierenden Bytes
+        offset_src: Startposition in der Quelle
+        offset_dst: Optionale Startposition im Ziel
+
+    Returns:
+        Anzahl der kopierten Bytes (weniger als count, wenn die Quelle kürzer ist)
+    """
+    global _copy_file_range_available, _sendfile_available
+
+    copied = 0
+
+    while _copy_file_range_available and copied < count:
+        try:
+            n = os.copy_file_range(src_fd, dst_fd, count - copied, offset_src + copied,
+                                   None if offset_dst is None else offset_dst + copied)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            if e.errno == errno.ENOSYS:
+                _copy_file_range_available = False
+            break
+        if n == 0:
+            return copied
+        copied += n
+
+    while _sendfile_available and offset_dst is None and copied < count:
+        try:
+            n = os.sendfile(dst_fd, src_fd, offset_src + copied, count - copied)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            if e.errno == errno.ENOSYS:
+                _sendfile_available = False
+            break
+        if n == 0:
+            return copied
+        copied += n
+
+    if copied < count:
+        copied += _copy_buffered(src_fd, dst_fd, count - copied, offset_src + copied,
+                                 None if offset_dst is None else offset_dst + copied)
+
+    return copied
+
+
+def scan_plain_utf8(fd: int, size: int, chunk_size: int = COPY_CHUNK_SIZE,
+                    on_block: Optional[Callable[[bytearray, int], None]] = None) -> Optional[bytes]:
+    """
+    Prüft, ob eine Datei unverändert in die Ausgabe übernommen werden kann.
+
+    Das ist der Fall, wenn sie gültiges UTF-8 ohne Wagenrücklauf ist: dann
+    liefert das Lesen im Textmodus exakt dieselben Bytes. Reiner ASCII-Text
+    wird ohne Dekodieren geprüft.
+
+    Args:
+        fd: Geöffneter Dateideskriptor
+        size: Anzahl der zu prüfenden Bytes
+        chunk_size: Blockgröße beim Lesen
+        on_block: Wird mit jedem geprüften Block und seiner Position aufgerufen
+
+    Returns:
+        Letztes Byte der Datei, oder None, wenn die Datei umgewandelt werden muss
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = bytearray(min(chunk_size, size))
+    view = memoryview(buffer)
+    offset = 0
+    last_byte = b''
+
+    try:
+        while offset < size:
+            n = os.preadv(fd, [view[:min(len(buffer), size - offset)]], offset)
+            if n == 0:
+                return None
+            block = buffer if n == len(buffer) else buffer[:n]
+            if b'\r' in block:
+                return None
+            # ASCII nur überspringen, wenn keine angefangene Mehrbyte-Folge aus dem vorigen Block offen ist
+            if not block.isascii() or decoder.getstate()[0]:
+                decoder.decode(block)
+            if on_block is not None:
+                on_block(block, offset)
+            offset += n
+            last_byte = bytes(block[-1:])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return None
+
+    return last_byte
+
+
+def read_plain(filepath: str, size: int, verify_utf8: bool = True) -> Optional[bytes]:
+    """
+    Liest eine kleine Datei mit einem einzigen read() als Bytes.
+
+    Für kleine Dateien ist das billiger als Kernel-Kopie mit vorherigem
+    Leeren des Ausgabepuffers; die Bytes können mit Header und Trenner
+    gebündelt geschrieben werden.
+
+    Args:
+        filepath: Pfad zur Markdown-Datei
+        size: Dateigröße aus der Suche
+        verify_utf8: Auf gültiges UTF-8 ohne Wagenrücklauf prüfen
+
+    Returns:
+        Dateiinhalt (b'' bei leerer Datei), oder None, wenn die Datei über den
+        normalen Weg verarbeitet werden muss (Umwandlung nötig, Größe hat sich
+        geändert oder Lesefehler)
+    """
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return None
+
+    try:
+        data = os.read(fd, size + 1)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    if len(data) != size:
+        return None
+    if verify_utf8:
+        if b'\r' in data:
+            return None
+        if not data.isascii():
+            try:
+                data.decode('utf-8')
+            except UnicodeDecodeError:
+                return None
+    return data
+
+
+def copy_passthrough(filepath: str, output, header: bytes, size: Optional[int] = None,
+                     verify_utf8: bool = True, digest=None) -> Optional[bytes]:
+    """
+    Hängt eine Datei ohne Dekodieren per Kernel-Kopie an die Ausgabe an.
+
+    Nur Header und Zeilenumbruch-Korrektur werden aus Python geschrieben,
+    der Dateiinhalt wird kernelseitig kopiert.
+
+    Args:
+        filepath: Pfad zur Markdown-Datei
+        output: Geöffneter binärer Ausgabestrom mit Dateideskriptor
+        header: Bytes, die vor dem Inhalt geschrieben werden
+        size: Bekannte Dateigröße aus der Suche (sonst per fstat)
+        verify_utf8: Vor dem Kopieren auf gültiges UTF-8 ohne Wagenrücklauf prüfen;
+            ohne Prüfung werden die Bytes unverändert übernommen
+        digest: Optionales hashlib-Objekt, das bei der Prüfung mit dem Inhalt
+            aktualisiert wird (nur mit verify_utf8)
+
+    Returns:
+        Letztes kopiertes Byte (b'' bei leerer Datei), oder None, wenn die Datei
+        über den normalen Weg verarbeitet werden muss (Umwandlung nötig oder Lesefehler)
+    """
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return None
+
+    try:
+        if size is None:
+            size = os.fstat(fd).st_size
+        if size == 0:
+            return b''
+
+        if verify_utf8:
+            on_block = None if digest is None else lambda block, offset: digest.update(block)
+            last_byte = scan_plain_utf8(fd, size, on_block=on_block)
+        else:
+            last_byte = os.pread(fd, 1, size - 1)
+        if not last_byte:
+            return None
+
+        output.write(header)
+        output.flush()
+        copied = kernel_copy(fd, output.fileno(), size)
+        if copied != size:
+            raise OSError(f"Datei '{filepath}' wurde während des Kopierens verkürzt")
+
+        return last_byte
+    finally:
+        os.close(fd)
+
+
+class ReadAhead:
+    """
+    Liest die nächsten Dateien in einem begrenzten Thread-Pool vor.
+
+    Der Schreiber holt die Ergebnisse mit take() streng in der sortierten
+    Reihenfolge ab. Vorgelesen wird nur, solange die Summe der Dateigrößen
+    im Umlauf das Byte-Budget nicht überschreitet; Dateien, die allein
+    größer als das Budget sind, liest der Schreiber selbst stückweise.
+    """
+
+    def __init__(self, entries: List[Any], read_func: Callable[[Any], Any],
+                 size_func: Callable[[Any], Optional[int]], depth: int, byte_budget: int):
+        """
+        Args:
+            entries: Eingabedateien in Schreibreihenfolge
+            read_func: Liest eine Datei (läuft in einem Pool-Thread)
+            size_func: Geschätzte Größe einer Datei in Bytes; None = nicht vorlesen
+            depth: Höchstzahl gleichzeitig vorgelesener Dateien
+            byte_budget: Höchstsumme der Größen aller vorgelesenen Dateien
+        """
+        self.entries = entries
+        self.read_func = read_func
+        self.size_func = size_func
+        self.depth = max(1, depth)
+        self.byte_budget = byte_budget
+
+        self._pool = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix='md-read')
+        self._pending: Dict[int, Tuple[Any, int]] = {}
+        self._next = 0
+        self._inflight_bytes = 0
+
+        self.blocked_seconds = 0.0
+        self.peak_depth = 0
+        self.peak_bytes = 0
+        self._depth_total = 0
+        self._takes = 0
+
+    def __enter__(self) -> 'ReadAhead':
+        # Vorgelesen wird erst mit dem ersten take()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def mean_depth(self) -> float:
+        """Mittlere Anzahl fertig vorgelesener Dateien, wenn der Schreiber eine abholt."""
+        return self._depth_total / self._takes if self._takes else 0.0
+
+    def _fill(self):
+        """Reicht weitere Dateien ein, bis Anzahl oder Byte-Budget erreicht sind."""
+        while len(self._pending) < self.depth and self._next < len(self.entries):
+            index = self._next
+            size = self.size_func(self.entries[index])
+
+            if size is None or size > self.byte_budget:
+                self._next += 1
+                continue
+
+            if self._inflight_bytes + size > self.byte_budget:
+                break
+
+            future = self._pool.submit(self.read_func, self.entries[index])
+            self._pending[index] = (future, size)
+            self._inflight_bytes += size
+            self._next += 1
+
+        self.peak_bytes = max(self.peak_bytes, self._inflight_bytes)
+
+    def take(self, index: int) -> Tuple[bool, Any]:
+        """
+        Holt das Ergebnis für die Datei an Position index ab.
+
+        Returns:
+            Tupel (vorgelesen, Ergebnis von read_func); bei nicht vorgelesenen
+            Dateien (False, None)
+        """
+        self._fill()
+
+        item = self._pending.pop(index, None)
+        if item is None:
+            return False, None
+
+        future, size = item
+        ready = future.done() + sum(1 for pending, _ in self._pending.values() if pending.done())
+        self.peak_depth = max(self.peak_depth, ready)
+        self._depth_total += ready
+        self._takes += 1
+
+        if not future.done():
+            started = time.perf_counter()
+            result = future.result()
+            self.blocked_seconds += time.perf_counter() - started
+        else:
+            result = future.result()
+
+        self._inflight_bytes -= size
+        return True, result
+
+
+class PositionalAbort(Exception):
+    """Die Ausgabe lässt sich nicht allein aus den stat-Größen vorausberechnen."""
+
+
+class Segment(NamedTuple):
+    """Abschnitt einer Quelldatei in der Ausgabe: Header, Inhalt, Zeilenumbruch und Trenner."""
+    path: str
+    offset: int
+    header: bytes
+    size: int
+    tail: bytes
+    last_byte: bytes
+
+
+def _probe_last_byte(path: str, size: int) -> bytes:
+    """Liest das letzte Byte einer Datei."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, 1, size - 1)
+    finally:
+        os.close(fd)
+
+
+def _write_segment(segment: Segment, out_fd: int, verify_utf8: bool):
+    """Schreibt einen Abschnitt positionsgenau; bricht bei jeder Abweichung vom Plan ab."""
+    fd = os.open(segment.path, os.O_RDONLY)
+    try:
+        write_all(out_fd, segment.header, segment.offset)
+        body_offset = segment.offset + len(segment.header)
+
+        if verify_utf8:
+            def on_block(block: bytearray, offset: int):
+                write_all(out_fd, block, body_offset + offset)
+
+            last_byte = scan_plain_utf8(fd, segment.size, on_block=on_block)
+            if last_byte is None:
+                raise PositionalAbort(f"'{segment.path}' muss umgewandelt werden")
+        else:
+            if kernel_copy(fd, out_fd, segment.size, 0, body_offset) != segment.size:
+                raise PositionalAbort(f"'{segment.path}' ist kürzer als bei der Suche")
+            last_byte = os.pread(fd, 1, segment.size - 1)
+
+        if last_byte != segment.last_byte or os.pread(fd, 1, segment.size):
+            raise PositionalAbort(f"'{segment.path}' hat sich seit der Suche verändert")
+
+        write_all(out_fd, segment.tail, body_offset + segment.size)
+    finally:
+        os.close(fd)
+
+
+def plan_segments(entries: List[Tuple[Any, bytes, bool]], separator: bytes,
+                  pool: ThreadPoolExecutor) -> List[Segment]:
+    """
+    Berechnet die Lage aller Abschnitte in der Ausgabe aus den stat-Größen.
+
+    Args:
+        entries: Tupel (FileRecord, Header-Bytes, Trenner anhängen) in Schreibreihenfolge
+        separator: Bytes des Trenners zwischen Dateien
+        pool: Thread-Pool zum parallelen Lesen der letzten Bytes
+
+    Returns:
+        Abschnitte mit Startposition; leere Dateien fallen wie beim seriellen Schreiben weg
+    """
+    non_empty = [entry for entry in entries if entry[0].size > 0]
+    last_bytes = pool.map(lambda entry: _probe_last_byte(entry[0].path, entry[0].size), non_empty)
+
+    segments = []
+    offset = 0
+    for (record, header, add_separator), last_byte in zip(non_empty, last_bytes):
+        tail = (b'' if last_byte == b'\n' else b'\n') + (separator if add_separator else b'')
+        segments.append(Segment(record.path, offset, header, record.size, tail, last_byte))
+        offset += len(header) + record.size + len(tail)
+
+    return segments
+
+
+def merge_positional(entries: List[Tuple[Any, bytes, bool]], out_fd: int, separator: bytes,
+                     workers: int, verify_utf8: bool = True) -> List[Segment]:
+    """
+    Schreibt alle Dateien parallel an vorausberechnete Positionen.
+
+    Die Ausgabe wird mit os.posix_fallocate in voller Größe angelegt; danach
+    schreiben mehrere Threads ihre Abschnitte mit os.pwrite bzw.
+    positionsgenauem copy_file_range. Das Ergebnis ist byte-identisch mit dem
+    seriellen Schreiben, sofern keine Datei umgewandelt werden muss.
+
+    Args:
+        entries: Tupel (FileRecord, Header-Bytes, Trenner anhängen) in Schreibreihenfolge
+        out_fd: Dateideskriptor der (leeren) Ausgabedatei
+        separator: Bytes des Trenners zwischen Dateien
+        workers: Anzahl der schreibenden Threads
+        verify_utf8: Inhalte beim Kopieren auf gültiges UTF-8 ohne Wagenrücklauf prüfen
+
+    Returns:
+        Die geschriebenen Abschnitte
+
+    Raises:
+        PositionalAbort: Wenn eine Datei umgewandelt werden müsste oder sich
+            seit der Suche verändert hat; die Ausgabe ist dann unvollständig
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='md-pwrite') as pool:
+        try:
+            segments = plan_segments(entries, separator, pool)
+        except OSError as e:
+            raise PositionalAbort(str(e))
+
+        total = segments[-1].offset + len(segments[-1].header) + segments[-1].size + len(segments[-1].tail) \
+            if segments else 0
+
+        if total:
+            try:
+                os.posix_fallocate(out_fd, 0, total)
+            except (AttributeError, OSError):
+                os.ftruncate(out_fd, total)
+
+        try:
+            for _ in pool.map(lambda segment: _write_segment(segment, out_fd, verify_utf8), segments):
+                pass
+        except OSError as e:
+            raise PositionalAbort(str(e))
+
+    return segments
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Speichersparende Menge von Zeichenketten für MD-Merger
+"""
+
+import array
+from typing import Optional
+
+# Anfangsgröße der Tabelle (Zweierpotenz)
+INITIAL_SLOTS = 1024
+
+# Höchstens so viel der Tabelle wird belegt, bevor sie verdoppelt wird
+MAX_LOAD = 0.5
+
+_MASK64 = (1 << 64) - 1
+
+
+class Hash64Set:
+    """
+    Menge von Zeichenketten, gespeichert als 64-Bit-Hashes.
+
+    Die Hashes liegen in einem array('Q') mit offener Adressierung (lineares
+    Sondieren); 0 markiert einen freien Platz. Pro Eintrag kostet das bei
+    halber Belegung etwa 16 Bytes statt eines str-Objekts samt Set-Eintrag.
+    Ohne Prüfung gelten zwei Zeichenketten mit gleichem Hash als gleich; bei
+    64 Bit ist das selbst für Milliarden Einträge praktisch ausgeschlossen.
+    Mit verify=True werden die Zeichenketten zusätzlich UTF-8-kodiert in
+    einem fortlaufenden Puffer abgelegt und bei gleichem Hash verglichen.
+
+    Verwendet Pythons hash() für str: schnell und im str zwischengespeichert,
+    aber pro Prozess zufällig (PYTHONHASHSEED). Die Menge ist deshalb nur
+    innerhalb eines Laufs gültig und wird nicht gespeichert.
+    """
+
+    def __init__(self, verify: bool = False, slots: int = INITIAL_SLOTS):
+        """
+        Args:
+            verify: Bei gleichem Hash die Zeichenketten vergleichen
+            slots: Anfangsgröße der Tabelle (wird auf eine Zweierpotenz aufgerundet)
+        """
+        size = 1
+        while size < slots:
+            size *= 2
+        self.verify = verify
+        self._count = 0
+        self._table = array.array('Q', bytes(8 * size))
+        self._offsets: Optional[array.array] = array.array('Q', bytes(8 * size)) if verify else None
+        self._lengths: Optional[array.array] = array.array('I', bytes(4 * size)) if verify else None
+        self._data = bytearray()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        slot, found = self._find(key, self._hash(key))
+        return found
+
+    def add(self, key: str) -> bool:
+        """
+        Fügt key hinzu.
+
+        Returns:
+            True, wenn key neu war; False, wenn er schon enthalten ist
+        """
+        value = (hash(key) & _MASK64) or 1
+        table = self._table
+        mask = len(table) - 1
+        slot = value & mask
+        # Sondieren direkt hier statt über _find: add liegt im Zeilen-Hotpath
+        current = table[slot]
+        while current:
+            if current == value and (not self.verify or self._equals(slot, key)):
+                return False
+            slot = (slot + 1) & mask
+            current = table[slot]
+
+        table[slot] = value
+        if self.verify:
+            encoded = key.encode('utf-8')
+            self._offsets[slot] = len(self._data)
+            self._lengths[slot] = len(encoded)
+            self._data += encoded
+        self._count += 1
+        if self._count > len(table) * MAX_LOAD:
+            self._grow()
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        """Belegter Speicher der Tabellen und des Puffers in Bytes."""
+        total = self._table.itemsize * len(self._table) + len(self._data)
+        if self.verify:
+            total += self._offsets.itemsize * len(self._offsets) + self._lengths.itemsize * len(self._lengths)
+        return total
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 ist für freie Plätze reserviert
+        return (hash(key) & _MASK64) or 1
+
+    def _find(self, key: str, value: int) -> tuple:
+        """(Platz, gefunden): Platz des Eintrags oder der erste freie Platz dahinter."""
+        table = self._table
+        mask = len(table) - 1
+        slot = value & mask
+        while True:
+            current = table[slot]
+            if current == 0:
+                return slot, False
+            if current == value and (not self.verify or self._equals(slot, key)):
+                return slot, True
+            slot = (slot + 1) & mask
+
+    def _equals(self, slot: int, key: str) -> bool:
+        offset = self._offsets[slot]
+        return self._data[offset:offset + self._lengths[slot]] == key.encode('utf-8')
+
+    def _grow(self):
+        old_table, old_offsets, old_lengths = self._table, self._offsets, self._lengths
+        size = 2 * len(old_table)
+        mask = size - 1
+        table = array.array('Q', bytes(8 * size))
+        offsets = array.array('Q', bytes(8 * size)) if self.verify else None
+        lengths = array.array('I', bytes(4 * size)) if self.verify else None
+
+        for old_slot, value in enumerate(old_table):
+            if value == 0:
+                continue
+            slot = value & mask
+            while table[slot] != 0:
+                slot = (slot + 1) & mask
+            table[slot] = value
+            if self.verify:
+                offsets[slot] = old_offsets[old_slot]
+                lengths[slot] = old_lengths[old_slot]
+
+        self._table, self._offsets, self._lengths = table, offsets, lengths
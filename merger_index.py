@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Segment-Index für inkrementelles Zusammenfügen mit MD-Merger
+"""
+
+import os
+import hashlib
+import json
+import sys
+import time
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from merger_discovery import RACY_MTIME_NS
+from merger_output import write_json_atomic
+
+INDEX_VERSION = 4
+
+# So viele Bytes am Ende der Ausgabe werden zur Erkennung von Handänderungen geprüft
+TAIL_CHECK_BYTES = 64 * 1024
+
+
+def default_index_file(output_file: str) -> str:
+    """Pfad des Segment-Index neben der Ausgabedatei."""
+    return f"{output_file}.index.json"
+
+
+def tail_checksum(fd: int, size: int) -> str:
+    """Prüfsumme der letzten TAIL_CHECK_BYTES einer Datei der Länge size."""
+    length = min(size, TAIL_CHECK_BYTES)
+    return hashlib.blake2b(os.pread(fd, length, size - length), digest_size=16).hexdigest()
+
+
+class SegmentIndex:
+    """
+    Segment-Index einer Ausgabedatei.
+
+    Hält pro Quelldatei deren Größe, mtime_ns und Inode, eine Prüfsumme des
+    geschriebenen Inhalts sowie Startposition und Länge ihres Abschnitts
+    (Header, Inhalt und Zeilenumbruch-Korrektur, ohne Trenner) in der Ausgabe.
+    Ein späterer Lauf kann unveränderte Abschnitte direkt aus der alten
+    Ausgabe übernehmen, statt die Quelle erneut zu lesen, oder neue Dateien
+    nur anhängen (append_point). Quellen, deren mtime so kurz vor dem Beginn
+    des Laufs liegt, der sie gelesen hat, können sich danach noch in derselben
+    Zeitstempel-Granularität geändert haben; ihre Abschnitte werden nie übernommen.
+    """
+
+    def __init__(self, options: Dict[str, Any], add_separators: bool = True):
+        """
+        Args:
+            options: Einstellungen, die den Inhalt der Abschnitte bestimmen;
+                ein Index mit anderen Einstellungen wird nicht wiederverwendet
+            add_separators: Ob die Ausgabe Trenner zwischen den Dateien enthält
+        """
+        self.options = options
+        self.add_separators = add_separators
+        self.entries: List[Dict[str, Any]] = []
+        self.output_size = 0
+        self.output_mtime_ns = 0
+        self.tail_hash: Optional[str] = None
+        # Beginn des Laufs, der die Quellen liest; mtimes ab RACY_MTIME_NS davor gelten als unsicher
+        self.started_ns = time.time_ns()
+        self._by_path: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, index_file: str, output_file: str, options: Dict[str, Any]) -> Optional['SegmentIndex']:
+        """
+        Lädt einen Index, sofern er zur aktuellen Ausgabedatei passt.
+
+        Die Ausgabedatei muss seit dem Schreiben des Index unverändert sein
+        (gleiche Größe und mtime_ns), sonst zeigen die Positionen ins Leere.
+        Das Ende der Datei wird zusätzlich in open_output() geprüft.
+
+        Returns:
+            Der Index oder None, wenn er fehlt, veraltet oder unbrauchbar ist
+        """
+        try:
+            with open(index_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            output_stat = os.stat(output_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Warnung: Segment-Index '{index_file}' konnte nicht gelesen werden: {e}", file=sys.stderr)
+            return None
+
+        if (data.get('version') != INDEX_VERSION
+                or data.get('options') != options
+                or data.get('output_size') != output_stat.st_size
+                or data.get('output_mtime_ns') != output_stat.st_mtime_ns):
+            return None
+
+        index = cls(options, data['add_separators'])
+        index.output_size = data['output_size']
+        index.output_mtime_ns = data['output_mtime_ns']
+        index.tail_hash = data['tail_hash']
+        index.started_ns = data['started_ns']
+        for entry in data.get('entries', []):
+            index.entries.append(entry)
+            index._by_path[entry['path']] = entry
+        return index
+
+    def open_output(self, output_file: str) -> Optional[BinaryIO]:
+        """
+        Öffnet die alte Ausgabedatei zum Lesen der wiederverwendbaren Abschnitte.
+
+        Wird zwischen load() und dem Öffnen die Datei ersetzt oder wurde ihr
+        Ende von Hand bearbeitet (mtime beibehalten, Prüfsumme weicht ab),
+        passt der Index nicht mehr; dann wird None zurückgegeben.
+        """
+        try:
+            file = open(output_file, 'rb')
+        except OSError:
+            return None
+
+        try:
+            fd = file.fileno()
+            output_stat = os.fstat(fd)
+            if (output_stat.st_size == self.output_size
+                    and output_stat.st_mtime_ns == self.output_mtime_ns
+                    and tail_checksum(fd, self.output_size) == self.tail_hash):
+                return file
+        except OSError:
+            pass
+
+        file.close()
+        return None
+
+    def append_point(self, files: List[Any], add_separators: bool) -> Optional[int]:
+        """
+        Prüft, ob die neue Dateiliste nur angehängte Dateien enthält.
+
+        Das ist der Fall, wenn die Dateien der alten Ausgabe unverändert genau
+        die ersten Einträge der neuen Liste sind und die Trenner-Einstellung
+        gleich geblieben ist.
+
+        Args:
+            files: Neue Liste der FileRecords in Ausgabereihenfolge
+            add_separators: Trenner-Einstellung des neuen Laufs
+
+        Returns:
+            Anzahl der bereits geschriebenen Dateien, oder None, wenn neu
+            geschrieben werden muss
+        """
+        count = len(self.entries)
+        if add_separators != self.add_separators or count == 0 or len(files) <= count:
+            return None
+
+        for entry, record in zip(self.entries, files):
+            if getattr(record, 'path', None) != entry['path'] or self.lookup(record) is None:
+                return None
+        return count
+
+    def written_count(self) -> int:
+        """Anzahl der Dateien, die tatsächlich in der Ausgabe stehen."""
+        return sum(1 for entry in self.entries if not entry['skipped'])
+
+    def trailing_separator(self) -> bool:
+        """
+        Ob nach der letzten geschriebenen Datei bereits ein Trenner steht.
+
+        Bei einer leeren Ausgabe gibt es nichts abzutrennen (True).
+        """
+        for entry in reversed(self.entries):
+            if not entry['skipped']:
+                return entry['offset'] + entry['length'] < self.output_size
+        return True
+
+    def lookup(self, record) -> Optional[Dict[str, Any]]:
+        """
+        Sucht den Abschnitt einer unveränderten Quelldatei.
+
+        Args:
+            record: FileRecord aus der Suche
+
+        Returns:
+            Eintrag mit 'offset', 'length', 'skipped' und 'reference', wenn Größe, mtime_ns
+            und Inode übereinstimmen und die mtime deutlich vor dem Lesen lag
+        """
+        entry = self._by_path.get(record.path)
+        if (entry is not None and entry['size'] == record.size
+                and entry['mtime_ns'] == record.mtime_ns and entry['ino'] == record.ino
+                and entry['mtime_ns'] < self.started_ns - RACY_MTIME_NS):
+            return entry
+        return None
+
+    def add(self, record, digest: Optional[str], offset: int, length: int, skipped: bool = False,
+            reference: Optional[str] = None):
+        """
+        Nimmt einen geschriebenen (oder übersprungenen) Abschnitt auf.
+
+        Bei Duplikaten ist reference der Pfad des ersten Vorkommens, auf das
+        der Abschnitt statt des Inhalts verweist.
+        """
+        entry = {
+            'path': record.path,
+            'size': record.size,
+            'mtime_ns': record.mtime_ns,
+            'ino': record.ino,
+            'hash': digest,
+            'offset': offset,
+            'length': length,
+            'skipped': skipped,
+            'reference': reference,
+        }
+        self.entries.append(entry)
+        self._by_path[record.path] = entry
+
+    def save(self, index_file: str, output_size: int, output_mtime_ns: int, tail_hash: str):
+        """Schreibt den Index atomar (siehe AtomicOutput)."""
+        self.output_size = output_size
+        self.output_mtime_ns = output_mtime_ns
+        self.tail_hash = tail_hash
+        data = {
+            'version': INDEX_VERSION,
+            'options': self.options,
+            'add_separators': self.add_separators,
+            'output_size': output_size,
+            'output_mtime_ns': output_mtime_ns,
+            'tail_hash': tail_hash,
+            'started_ns': self.started_ns,
+            'entries': self.entries,
+        }
+
+        try:
+            write_json_atomic(index_file, data, separators=(',', ':'))
+        except OSError as e:
+            print(f"Warnung: Segment-Index '{index_file}' konnte nicht geschrieben werden: {e}", file=sys.stderr)
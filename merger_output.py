@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Ausgabeziele für MD-Merger
+"""
+
+import os
+import bz2
+import io
+import json
+import lzma
+import stat
+import sys
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Optional
+
+# Wie die Ausgabe vor dem Umbenennen auf den Datenträger gebracht wird
+FSYNC_POLICIES = ('none', 'file', 'file+dir')
+
+DEFAULT_WRITE_BUFFER = 1024 * 1024
+
+# Ausgabepfad für die Standardausgabe
+STDOUT_PATH = '-'
+
+# Kompression der Ausgabe anhand der Dateiendung
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+# Blockgröße beim parallelen gzip (ein unabhängiges gzip-Member pro Block)
+GZIP_BLOCK_SIZE = 1024 * 1024
+
+
+def _default_file_mode() -> int:
+    """Rechte, die open(..., 'w') für eine neue Datei vergeben würde."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def fsync_directory(directory: str):
+    """Schreibt den Verzeichniseintrag (z. B. nach os.replace) auf den Datenträger."""
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicOutput:
+    """
+    Schreibt eine Ausgabedatei atomar.
+
+    Geschrieben wird in eine temporäre Datei im selben Verzeichnis, die erst
+    nach erfolgreichem Abschluss per os.replace über das Ziel gelegt wird.
+    Leser sehen so immer entweder die alte oder die vollständige neue Datei;
+    schlägt das Schreiben fehl, bleibt die bisherige Ausgabe unverändert.
+    """
+
+    def __init__(self, target: str, buffer_size: int = DEFAULT_WRITE_BUFFER, fsync_policy: str = 'none'):
+        """
+        Args:
+            target: Pfad zur Ausgabedatei (symbolische Links werden aufgelöst)
+            buffer_size: Größe des Schreibpuffers in Bytes
+            fsync_policy: 'none', 'file' (Datei vor dem Umbenennen synchronisieren)
+                oder 'file+dir' (zusätzlich das Verzeichnis nach dem Umbenennen)
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Strategie: {fsync_policy}")
+
+        self.target = os.path.realpath(target) if os.path.islink(target) else target
+        self.buffer_size = buffer_size
+        self.fsync_policy = fsync_policy
+        self.temp_path: Optional[str] = None
+        self.file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> BinaryIO:
+        directory, name = os.path.split(self.target)
+        fd, self.temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+
+        try:
+            try:
+                mode = stat.S_IMODE(os.stat(self.target).st_mode)
+            except FileNotFoundError:
+                mode = _default_file_mode()
+            os.fchmod(fd, mode)
+
+            self.file = os.fdopen(fd, 'wb', buffering=self.buffer_size)
+        except BaseException:
+            os.close(fd)
+            os.unlink(self.temp_path)
+            raise
+
+        return self.file
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc_type is not None:
+            self.discard()
+            return False
+
+        try:
+            self.file.flush()
+            if self.fsync_policy != 'none':
+                os.fsync(self.file.fileno())
+            self.file.close()
+
+            os.replace(self.temp_path, self.target)
+        except BaseException:
+            self.discard()
+            raise
+
+        if self.fsync_policy == 'file+dir':
+            fsync_directory(os.path.dirname(self.target))
+        return False
+
+    def discard(self):
+        """Verwirft die temporäre Datei; das Ziel bleibt unverändert."""
+        try:
+            self.file.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            os.unlink(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def write_json_atomic(target: str, data: Any, **options):
+    """
+    Schreibt data als JSON (UTF-8) atomar über AtomicOutput.
+
+    Args:
+        target: Zielpfad
+        data: Zu schreibende Daten
+        options: Weitere Argumente für json.dump
+    """
+    with AtomicOutput(target) as output:
+        text = io.TextIOWrapper(output, encoding='utf-8')
+        json.dump(data, text, **options)
+        text.flush()
+        # Die Binärdatei schließt AtomicOutput
+        text.detach()
+
+
+class AppendOutput:
+    """
+    Hängt an eine bestehende Ausgabedatei an.
+
+    Die Datei wird ohne O_APPEND geöffnet und ans Ende positioniert, damit
+    Kernel-Kopien (copy_file_range, sendfile) weiter möglich sind. Schlägt
+    das Schreiben fehl, wird die Datei auf ihre alte Länge zurückgeschnitten.
+    """
+
+    def __init__(self, target: str, expected_size: int, buffer_size: int = DEFAULT_WRITE_BUFFER,
+                 fsync_policy: str = 'none'):
+        """
+        Args:
+            target: Pfad zur Ausgabedatei
+            expected_size: Länge der Datei vor dem Anhängen; weicht sie ab, wird abgebrochen
+            buffer_size: Größe des Schreibpuffers in Bytes
+            fsync_policy: 'none', 'file' oder 'file+dir' (ohne Umbenennen wie 'file')
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Strategie: {fsync_policy}")
+
+        self.target = target
+        self.expected_size = expected_size
+        self.buffer_size = buffer_size
+        self.fsync_policy = fsync_policy
+        self.file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> BinaryIO:
+        fd = os.open(self.target, os.O_RDWR)
+        try:
+            if os.fstat(fd).st_size != self.expected_size:
+                raise OSError(f"Ausgabedatei '{self.target}' wurde während des Laufs verändert")
+            self.file = os.fdopen(fd, 'wb', buffering=self.buffer_size)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self.file.seek(self.expected_size)
+        return self.file
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc_type is not None:
+            self.discard()
+            return False
+
+        try:
+            self.file.flush()
+            if self.fsync_policy != 'none':
+                os.fsync(self.file.fileno())
+        except BaseException:
+            self.discard()
+            raise
+        self.file.close()
+        return False
+
+    def discard(self):
+        """Entfernt alles Angehängte; die Datei hat danach wieder ihre alte Länge."""
+        # Erst schließen, damit kein gepufferter Rest nach dem Kürzen geschrieben wird
+        try:
+            self.file.close()
+        except (OSError, ValueError):
+            pass
+        os.truncate(self.target, self.expected_size)
+
+
+class StreamOutput:
+    """
+    Schreibt in die Standardausgabe, z. B. in eine Pipe.
+
+    Geschrieben wird mit einem großen eigenen Puffer direkt auf den
+    Dateideskriptor der ursprünglichen Standardausgabe (sys.__stdout__),
+    auch wenn sys.stdout für Meldungen umgeleitet ist. Der Strom gilt immer
+    als nicht durchsuchbar; tell() zählt die geschriebenen Bytes. Schließt
+    der Empfänger die Pipe, bricht der nächste Schreibvorgang mit
+    BrokenPipeError ab.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_WRITE_BUFFER):
+        """
+        Args:
+            buffer_size: Größe des Schreibpuffers in Bytes
+        """
+        self.buffer_size = buffer_size
+        self.file: Optional[BinaryIO] = None
+        self._fd = -1
+        self._position = 0
+
+    def __enter__(self) -> 'StreamOutput':
+        stdout = sys.__stdout__
+        stdout.flush()
+        self._fd = stdout.fileno()
+        self.file = open(self._fd, 'wb', buffering=self.buffer_size, closefd=False)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        try:
+            self.file.close()
+        except OSError:
+            # Bei einem Abbruch (z. B. geschlossene Pipe) ist der Rest ohnehin verloren
+            if exc_type is None:
+                raise
+        return False
+
+    def write(self, data) -> int:
+        self.file.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def advance(self, count: int):
+        """Zählt Bytes, die am Puffer vorbei (Kernel-Kopie) in den Deskriptor geschrieben wurden."""
+        self._position += count
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self):
+        self.file.flush()
+
+    def fileno(self) -> int:
+        return self._fd
+
+
+def compression_for(path: str) -> Optional[str]:
+    """Kompressionsverfahren für eine Ausgabedatei anhand ihrer Endung (None = unkomprimiert)."""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+def _make_compressor(compression: str, level: Optional[int]):
+    """Erzeugt einen inkrementellen Kompressor mit compress() und flush()."""
+    if compression == 'gzip':
+        # wbits=31: gzip-Rahmen mit mtime 0, damit die Ausgabe reproduzierbar bleibt
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == 'bz2':
+        return bz2.BZ2Compressor(9 if level is None else level)
+    if compression == 'xz':
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    raise ValueError(f"Unbekanntes Kompressionsverfahren: {compression}")
+
+
+def open_compressed(raw: BinaryIO, compression: str, level: Optional[int] = None,
+                    workers: int = 0) -> 'CompressedOutput':
+    """
+    Öffnet einen komprimierenden Strom über raw.
+
+    Args:
+        raw: Binärer Ausgabestrom für die komprimierten Daten
+        compression: 'gzip', 'bz2' oder 'xz'
+        level: Kompressionsstufe (None = Standard des Verfahrens)
+        workers: Threads für paralleles gzip in unabhängigen Blöcken (0 = ein Strom)
+    """
+    if compression == 'gzip' and workers > 0:
+        return ParallelGzipOutput(raw, level, workers)
+    return CompressedOutput(raw, compression, level)
+
+
+def _gzip_member(data: bytes, level: Optional[int]) -> bytes:
+    """Komprimiert einen Block zu einem vollständigen, eigenständigen gzip-Member."""
+    compressor = _make_compressor('gzip', level)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressedOutput:
+    """
+    Komprimiert alles, was geschrieben wird, direkt in einen Ausgabestrom.
+
+    Die Ausgabe ist nicht durchsuchbar; tell() liefert die Anzahl der
+    unkomprimierten Bytes. Beim Schließen wird der Kompressor abgeschlossen,
+    der darunterliegende Strom bleibt offen.
+    """
+
+    def __init__(self, raw: BinaryIO, compression: str, level: Optional[int] = None):
+        """
+        Args:
+            raw: Binärer Ausgabestrom für die komprimierten Daten
+            compression: 'gzip', 'bz2' oder 'xz'
+            level: Kompressionsstufe (None = Standard des Verfahrens)
+        """
+        self.raw = raw
+        self._compressor = _make_compressor(compression, level)
+        self._position = 0
+
+    def __enter__(self) -> 'CompressedOutput':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc_type is None:
+            self.close()
+        return False
+
+    def write(self, data) -> int:
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self.raw.write(compressed)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """Schreibt den Rest des komprimierten Stroms."""
+        self.raw.write(self._compressor.flush())
+
+
+class ParallelGzipOutput(CompressedOutput):
+    """
+    gzip-Kompression auf mehreren Kernen.
+
+    Die Eingabe wird in Blöcke geteilt, die in einem Thread-Pool unabhängig
+    voneinander zu eigenständigen gzip-Membern komprimiert und in der
+    ursprünglichen Reihenfolge hintereinander geschrieben werden. gzip und
+    zcat entpacken solche Dateien wie einen einzigen Strom; die Kompression
+    ist etwas schwächer, weil jeder Block ohne Wörterbuch beginnt.
+    """
+
+    def __init__(self, raw: BinaryIO, level: Optional[int] = None, workers: int = 2,
+                 block_size: int = GZIP_BLOCK_SIZE):
+        """
+        Args:
+            raw: Binärer Ausgabestrom für die komprimierten Daten
+            level: Kompressionsstufe (None = 6)
+            workers: Anzahl der Kompressions-Threads
+            block_size: Unkomprimierte Größe eines Blocks
+        """
+        self.raw = raw
+        self.level = level
+        self.workers = max(1, workers)
+        self.block_size = block_size
+        self._position = 0
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._members = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='md-gzip')
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        try:
+            if exc_type is None:
+                self.close()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        return False
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        # Höchstens zwei Blöcke pro Thread im Umlauf, sonst wächst der Speicher mit der Ausgabe
+        while len(self._pending) >= 2 * self.workers:
+            self.raw.write(self._pending.popleft().result())
+        self._pending.append(self._pool.submit(_gzip_member, block, self.level))
+        self._members += 1
+
+    def close(self):
+        """Komprimiert den letzten Block und schreibt alle ausstehenden Member."""
+        if self._buffer or self._members == 0:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.raw.write(self._pending.popleft().result())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Aufteilen der Ausgabe von MD-Merger in mehrere Teildateien
+"""
+
+import os
+from typing import Callable, Iterable, List, Optional
+
+from merger_discovery import FileRecord
+from merger_output import COMPRESSION_SUFFIXES, write_json_atomic
+
+SHARD_MANIFEST_VERSION = 1
+
+
+def parse_size(text: str) -> int:
+    """Wandelt Größenangaben wie '1K', '64M' oder '4G' in Bytes um."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text[-1:].upper() in units:
+        return int(float(text[:-1]) * units[text[-1].upper()])
+    return int(text)
+
+
+def shard_path(output_file: str, number: int, count: int) -> str:
+    """
+    Pfad der Teildatei number (ab 1) von count.
+
+    Die Nummer steht vor der Endung: docs.md → docs.001.md,
+    docs.md.gz → docs.001.md.gz.
+    """
+    base, compression_suffix = os.path.splitext(output_file)
+    if compression_suffix.lower() not in COMPRESSION_SUFFIXES:
+        base, compression_suffix = output_file, ''
+    stem, suffix = os.path.splitext(base)
+    width = max(3, len(str(count)))
+    return f"{stem}.{number:0{width}d}{suffix}{compression_suffix}"
+
+
+def shard_manifest_file(output_file: str) -> str:
+    """Pfad des Manifests, das die Teildateien und ihre Quellen auflistet."""
+    return f"{output_file}.shards.json"
+
+
+def plan_shards(records: Iterable[FileRecord], segment_size: Callable[[FileRecord], int],
+                max_bytes: Optional[int] = None, max_files: Optional[int] = None,
+                fixed_bytes: int = 0) -> List[range]:
+    """
+    Verteilt die Dateien in Ausgabereihenfolge auf Teildateien.
+
+    Geteilt wird nur an Dateigrenzen. Eine neue Teildatei beginnt, sobald die
+    nächste Datei das Größen- oder Anzahllimit überschreiten würde; eine
+    einzelne Datei über dem Größenlimit bekommt eine eigene Teildatei.
+
+    Args:
+        records: FileRecords in Ausgabereihenfolge
+        segment_size: Obergrenze der Bytes, die eine Datei in der Ausgabe belegt
+        max_bytes: Größenlimit pro Teildatei (None = unbegrenzt)
+        max_files: Höchstzahl der Dateien pro Teildatei (None = unbegrenzt)
+        fixed_bytes: Bytes, die jede Teildatei vor der ersten Datei belegt
+
+    Returns:
+        Liste der Teildateien, jede als Bereich ihrer Positionen in records
+    """
+    shards: List[range] = []
+    start = position = 0
+    current_bytes = fixed_bytes
+
+    for record in records:
+        size = segment_size(record)
+        count = position - start
+        if count and ((max_files is not None and count >= max_files)
+                      or (max_bytes is not None and current_bytes + size > max_bytes)):
+            shards.append(range(start, position))
+            start, current_bytes = position, fixed_bytes
+        current_bytes += size
+        position += 1
+
+    if position > start:
+        shards.append(range(start, position))
+    return shards
+
+
+def write_shard_manifest(manifest_file: str, shards: List[dict]):
+    """
+    Schreibt das Manifest der Teildateien atomar (siehe AtomicOutput).
+
+    Args:
+        manifest_file: Zielpfad
+        shards: Je Teildatei ein Dict mit 'path', 'bytes' und 'sources'
+    """
+    data = {'version': SHARD_MANIFEST_VERSION, 'shards': shards}
+    write_json_atomic(manifest_file, data, ensure_ascii=False, indent=2)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Zerlegt eine mit MD-Merger zusammengefügte Datei wieder in ihre Quelldateien
+
+Aufruf: python merger_split.py <zusammengefuegt.md> -o <Zielverzeichnis> [Optionen]
+"""
+
+import os
+import argparse
+import mmap
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from merger_dedup import REFERENCE_PREFIX, REFERENCE_SUFFIX
+from merger_engine import kernel_copy
+from merger_output import AtomicOutput
+from merger_timestamps import (DOCUMENT_TIMESTAMP_PREFIX, DOCUMENT_TIMESTAMP_SIZE,
+                               FILE_TIMESTAMP_PREFIX, FILE_TIMESTAMP_SIZE)
+
+HEADER_PREFIX = b'<!-- Quelle: '
+HEADER_SUFFIX = b' -->\n'
+SEPARATOR = b'\n---\n\n'
+
+# Ende eines Kommentars auf eigener Zeile (Header-Zeile, Zeitstempel)
+COMMENT_END = b' -->\n'
+
+# Längster Pfad, der in einem Header noch akzeptiert wird
+MAX_HEADER_PATH = 4096
+
+DEFAULT_SPLIT_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+
+class SplitSegment(NamedTuple):
+    """Abschnitt einer Quelldatei in der zusammengefügten Datei (ohne Header und Trenner)."""
+    path: str
+    start: int
+    end: int
+
+
+def _parse_header(data, position: int) -> Optional[tuple]:
+    """
+    Liest den Header an position: Header-Zeile, optional der Zeitstempel
+    pro Datei (output.add_timestamps), dann die Leerzeile vor dem Inhalt.
+
+    Returns:
+        (Pfad, Beginn des Inhalts) oder None, wenn dort kein gültiger Header steht
+    """
+    path_start = position + len(HEADER_PREFIX)
+    limit = min(len(data), path_start + MAX_HEADER_PATH + len(HEADER_SUFFIX))
+    path_end = data.find(HEADER_SUFFIX, path_start, limit)
+    if path_end < 0:
+        return None
+
+    raw_path = data[path_start:path_end]
+    if not raw_path:
+        return None
+
+    content_start = path_end + len(HEADER_SUFFIX)
+    if data[content_start:content_start + len(FILE_TIMESTAMP_PREFIX)] == FILE_TIMESTAMP_PREFIX:
+        content_start += FILE_TIMESTAMP_SIZE
+        if data[content_start - len(COMMENT_END):content_start] != COMMENT_END:
+            return None
+    if data[content_start:content_start + 1] != b'\n':
+        return None
+
+    try:
+        return raw_path.decode('utf-8'), content_start + 1
+    except UnicodeDecodeError:
+        return None
+
+
+def find_segments(data, separators: bool = True) -> List[SplitSegment]:
+    """
+    Findet alle Abschnitte in einem Durchgang über die Daten.
+
+    Ein Header zählt nur am Anfang der Datei oder direkt nach einem Trenner
+    (ohne Trenner: am Zeilenanfang), damit gleichlautende Kommentare im
+    Inhalt einer Quelle die Zerlegung nicht stören. Der Trenner vor einem
+    Header gehört zu keiner Quelle und wird weggelassen, ebenso ein Trenner
+    am Dateiende (stammt von übersprungenen Dateien am Ende der Liste).
+    Ein Zeitstempel pro Dokument am Anfang wird übersprungen.
+
+    Args:
+        data: bytes oder mmap der zusammengefügten Datei
+        separators: Ob die Datei mit Trennern zwischen den Quellen erzeugt wurde
+
+    Returns:
+        Abschnitte in der Reihenfolge der Datei
+    """
+    needle = (SEPARATOR if separators else b'\n') + HEADER_PREFIX
+    # Je Header: (Pfad, Ende des vorherigen Inhalts, Beginn des eigenen Inhalts)
+    headers = []
+    search_from = 0
+    if (data[:len(DOCUMENT_TIMESTAMP_PREFIX)] == DOCUMENT_TIMESTAMP_PREFIX
+            and data[DOCUMENT_TIMESTAMP_SIZE - len(COMMENT_END) - 1:DOCUMENT_TIMESTAMP_SIZE] == COMMENT_END + b'\n'):
+        search_from = DOCUMENT_TIMESTAMP_SIZE
+    first = data[search_from:search_from + len(HEADER_PREFIX)] == HEADER_PREFIX
+    position = search_from if first else None
+
+    while True:
+        if position is None:
+            found = data.find(needle, search_from)
+            if found < 0:
+                break
+            position = found + len(needle) - len(HEADER_PREFIX)
+            # Ohne Trenner gehört der Zeilenumbruch noch zum vorherigen Inhalt
+            previous_end = found if separators else position
+        else:
+            previous_end = position
+
+        parsed = _parse_header(data, position)
+        if parsed is not None:
+            path, content_start = parsed
+            headers.append((path, previous_end, content_start))
+            search_from = content_start
+        else:
+            search_from = position
+        position = None
+
+    data_end = len(data)
+    if separators and data_end - len(SEPARATOR) >= search_from \
+            and data[data_end - len(SEPARATOR):] == SEPARATOR:
+        data_end -= len(SEPARATOR)
+
+    segments = []
+    for number, (path, _, content_start) in enumerate(headers):
+        end = headers[number + 1][1] if number + 1 < len(headers) else data_end
+        segments.append(SplitSegment(path, content_start, end))
+    return segments
+
+
+def _reference(data, segment: SplitSegment) -> Optional[str]:
+    """Pfad des ersten Vorkommens, wenn der Abschnitt nur ein Verweis (--dedup reference) ist."""
+    if segment.end - segment.start > len(REFERENCE_PREFIX) + MAX_HEADER_PATH + len(REFERENCE_SUFFIX) + 2:
+        return None
+    line = data[segment.start:segment.end].rstrip(b'\r\n')
+    if (not line.startswith(REFERENCE_PREFIX) or not line.endswith(REFERENCE_SUFFIX)
+            or b'\n' in line or len(line) <= len(REFERENCE_PREFIX) + len(REFERENCE_SUFFIX)):
+        return None
+    try:
+        return line[len(REFERENCE_PREFIX):-len(REFERENCE_SUFFIX)].decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def resolve_references(data, segments: List[SplitSegment]) -> List[SplitSegment]:
+    """
+    Ersetzt Verweise von --dedup reference durch den Abschnitt ihres ersten Vorkommens.
+
+    Duplikate sind inhaltsgleich, ihr Inhalt wird daher aus dem referenzierten
+    Abschnitt kopiert. Verweise auf Quellen, die nicht in der Datei stehen,
+    werden mit einer Warnung weggelassen, damit nie die Verweiszeile als
+    Inhalt geschrieben wird.
+
+    Args:
+        data: bytes oder mmap der zusammengefügten Datei
+        segments: Abschnitte aus find_segments
+
+    Returns:
+        Abschnitte mit aufgelösten Verweisen
+    """
+    contents = {}
+    resolved = []
+    for segment in segments:
+        reference = _reference(data, segment)
+        if reference is None:
+            contents.setdefault(segment.path, segment)
+            resolved.append(segment)
+            continue
+
+        original = contents.get(reference)
+        if original is None:
+            print(f"Warnung: '{segment.path}' ist ein Verweis auf '{reference}', dessen Inhalt "
+                  f"nicht in der Datei steht, übersprungen.", file=sys.stderr)
+            continue
+        resolved.append(segment._replace(start=original.start, end=original.end))
+    return resolved
+
+
+def target_path(output_dir: str, source_path: str, base: str) -> Optional[str]:
+    """
+    Zielpfad einer Quelle unterhalb von output_dir.
+
+    Der Pfad aus dem Header wird relativ zu base genommen. Pfade, die dabei
+    nach oben aus base herausführen, werden abgelehnt (None), ebenso Ziele,
+    die selbst symbolische Links sind oder über solche außerhalb von
+    output_dir landen würden.
+    """
+    relative = os.path.normpath(os.path.relpath(os.path.abspath(source_path), base))
+    if os.path.isabs(relative) or relative == os.curdir or relative.split(os.sep)[0] == os.pardir:
+        return None
+
+    root = os.path.realpath(output_dir)
+    target = os.path.join(root, relative)
+    parent = os.path.realpath(os.path.dirname(target))
+    if (parent != root and not parent.startswith(root + os.sep)) or os.path.islink(target):
+        return None
+    return target
+
+
+def _write_segment(src_fd: int, segment: SplitSegment, target: str):
+    """Schreibt einen Abschnitt per Kernel-Kopie atomar an sein Ziel."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    count = segment.end - segment.start
+    with AtomicOutput(target) as output:
+        if kernel_copy(src_fd, output.fileno(), count, segment.start) != count:
+            raise OSError(f"Zusammengefügte Datei ist kürzer als erwartet ({segment.path})")
+
+
+def split_merged_file(merged_file: str, output_dir: str, base: str = None, separators: bool = True,
+                      workers: int = DEFAULT_SPLIT_WORKERS, dry_run: bool = False) -> int:
+    """
+    Schreibt jeden Abschnitt einer zusammengefügten Datei an seinen relativen Pfad.
+
+    Die Datei wird per mmap in einem Durchgang nach Headern durchsucht, ohne
+    sie in den Speicher zu laden; Verweise von --dedup reference werden durch
+    den Inhalt ihres ersten Vorkommens ersetzt. Die Inhalte kopiert ein Thread-Pool
+    kernelseitig (copy_file_range) in die Zieldateien.
+
+    Args:
+        merged_file: Pfad zur zusammengefügten Datei
+        output_dir: Zielverzeichnis
+        base: Verzeichnis, relativ zu dem die Pfade aus den Headern genommen
+            werden (Standard: gemeinsames Verzeichnis aller Quellen)
+        separators: Ob die Datei mit Trennern erzeugt wurde
+        workers: Anzahl der Schreib-Threads
+        dry_run: Nur anzeigen, was geschrieben würde
+
+    Returns:
+        Anzahl der geschriebenen (bei dry_run: zu schreibenden) Dateien;
+        0 mit einer Warnung, wenn die Datei keinen Header enthält
+    """
+    with open(merged_file, 'rb') as file:
+        segments = []
+        if os.fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if hasattr(data, 'madvise'):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                segments = resolve_references(data, find_segments(data, separators))
+
+        if not segments:
+            print(f"Warnung: '{merged_file}' enthält keine Header der Form "
+                  f"'<!-- Quelle: ... -->', nichts zu zerlegen.", file=sys.stderr)
+            return 0
+
+        if base is None:
+            base = os.path.commonpath([os.path.dirname(os.path.abspath(s.path)) for s in segments])
+        base = os.path.abspath(base)
+
+        written = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='md-split') as pool:
+            for segment in segments:
+                target = target_path(output_dir, segment.path, base)
+                if target is None:
+                    print(f"Warnung: '{segment.path}' liegt außerhalb von '{base}', übersprungen.", file=sys.stderr)
+                    continue
+
+                print(f"{segment.path} -> {target} ({segment.end - segment.start:,} Bytes)")
+                if dry_run:
+                    written += 1
+                    continue
+
+                # Begrenzte Warteschlange: Fehler fallen früh auf
+                while len(pending) >= 4 * max(1, workers):
+                    pending.popleft().result()
+                pending.append(pool.submit(_write_segment, file.fileno(), segment, target))
+                written += 1
+
+            while pending:
+                pending.popleft().result()
+
+    return written
+
+
+def main():
+    """Hauptfunktion des Zerlegers."""
+
+    parser = argparse.ArgumentParser(
+        description='Zerlegt eine zusammengefügte Markdown-Datei anhand der '
+                    '<!-- Quelle: ... -->-Header wieder in ihre Quelldateien.'
+    )
+    parser.add_argument('merged_file', help='Zusammengefügte Datei')
+    parser.add_argument('-o', '--output-dir', required=True, help='Zielverzeichnis für die Quelldateien')
+    parser.add_argument('--base', help='Pfade aus den Headern relativ zu diesem Verzeichnis nehmen '
+                                       '(Standard: gemeinsames Verzeichnis aller Quellen)')
+    parser.add_argument('--no-separators', action='store_true',
+                        help='Die Datei wurde mit --no-separators erzeugt')
+    parser.add_argument('--workers', type=int, default=DEFAULT_SPLIT_WORKERS, metavar='N',
+                        help=f'Anzahl der Schreib-Threads (Standard: {DEFAULT_SPLIT_WORKERS})')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='Nur anzeigen, was geschrieben würde')
+    args = parser.parse_args()
+
+    try:
+        written = split_merged_file(args.merged_file, args.output_dir, args.base,
+                                    separators=not args.no_separators, workers=args.workers,
+                                    dry_run=args.dry_run)
+    except OSError as e:
+        print(f"Fehler beim Zerlegen von '{args.merged_file}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.dry_run:
+        print(f"\n{written} Dateien würden nach '{args.output_dir}' geschrieben.")
+    else:
+        print(f"\n{written} Dateien geschrieben nach '{args.output_dir}'.")
+    if not written:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Vorlagen für Header und Trenner (separators.*) für MD-Merger
+"""
+
+import os
+import string
+import time
+from typing import Callable, List, Optional, Union
+
+from merger_dedup import hash_file
+from merger_discovery import FileRecord
+from merger_timestamps import TimestampFormatter
+
+DEFAULT_HEADER_FORMAT = '<!-- Quelle: {filepath} -->'
+DEFAULT_BETWEEN_FILES = '---'
+
+# Felder, die in separators.header_format erlaubt sind
+HEADER_FIELDS = ('filepath', 'relpath', 'basename', 'size', 'mtime', 'index', 'hash')
+
+# Länge der Prüfsumme im Feld hash (blake2b, hexadezimal)
+HASH_LENGTH = 128
+
+# Pfadbestandteile, die os.path.relpath beim Normalisieren entfernt
+_UNNORMALIZED = frozenset(('', os.curdir, os.pardir))
+
+# Ein Teil des Headers: (Eintrag, Pfad, Position) → Bytes
+_Getter = Callable[[Union[str, FileRecord], str, int], bytes]
+
+
+def file_record(entry: Union[str, FileRecord]) -> FileRecord:
+    """FileRecord eines Eintrags; nur reine Pfade (API-Aufrufer) werden dafür abgefragt."""
+    if isinstance(entry, FileRecord):
+        return entry
+    try:
+        st = os.stat(entry)
+    except OSError:
+        return FileRecord(entry, 0, 0, 0, 0, 0)
+    return FileRecord.from_stat(entry, st)
+
+
+def _filepath(entry: Union[str, FileRecord], filepath: str, number: int) -> bytes:
+    return filepath.encode('utf-8')
+
+
+def _parse(template: str, option: str) -> List[tuple]:
+    """
+    Zerlegt eine Vorlage in (Text, Feld, Format) wie str.format.
+
+    Raises:
+        ValueError: Bei ungültiger Syntax oder Umwandlungen wie {filepath!r}
+    """
+    try:
+        parts = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise ValueError(f"Ungültiges {option}: {template!r} ({e})") from None
+    for _, field, spec, conversion in parts:
+        if conversion is not None or (spec and '{' in spec):
+            raise ValueError(f"Ungültiges {option}: {template!r} "
+                             f"(Umwandlungen und verschachtelte Felder sind nicht erlaubt)")
+    return [(literal, field, spec) for literal, field, spec, _ in parts]
+
+
+def separator_bytes(between_files: Optional[str]) -> bytes:
+    """
+    Trenner zwischen zwei Dateien aus separators.between_files.
+
+    Args:
+        between_files: Zeile zwischen den Dateien; leer oder None = keine Trenner
+
+    Returns:
+        Kodierter Trenner mit Leerzeilen ('\\n---\\n\\n'), oder b'' ohne Trenner
+
+    Raises:
+        ValueError: Wenn die Zeile Felder enthält
+    """
+    if not between_files:
+        return b''
+    parts = _parse(between_files, 'separators.between_files')
+    if any(field is not None for _, field, _ in parts):
+        raise ValueError(f"Ungültiges separators.between_files: {between_files!r} "
+                         f"(Felder sind nur in separators.header_format erlaubt)")
+    # Doppelte Klammern ({{ }}) stehen als einfache im Text
+    return f"\n{''.join(literal for literal, _, _ in parts)}\n\n".encode('utf-8')
+
+
+class HeaderTemplate:
+    """
+    separators.header_format, einmal in Text und Felder zerlegt.
+
+    Die Textteile werden einmal kodiert, jedes Feld wird zu einer Funktion,
+    die direkt Bytes liefert; pro Datei bleibt nur das Auswerten der Felder
+    und ein Verketten. Für Vorlagen mit genau einem Feld zwischen zwei
+    Texten (wie der Standard) wird ohne Liste direkt verkettet.
+
+    Felder (mit optionalem Format wie in str.format, z. B. {size:,} oder {hash:.12}):
+        filepath: Pfad wie gefunden
+        relpath: Pfad relativ zum Eingabeverzeichnis
+        basename: Dateiname
+        size: Größe in Bytes aus der Suche
+        mtime: Änderungszeit aus der Suche ('JJJJ-MM-TT HH:MM:SS', mit Format strftime)
+        index: Position in der Ausgabe, ab 1
+        hash: blake2b des Inhalts; liest die Datei ein zweites Mal
+    """
+
+    def __init__(self, header_format: Optional[str] = DEFAULT_HEADER_FORMAT, base_dir: Optional[str] = None):
+        """
+        Args:
+            header_format: Vorlage für die Header-Zeile; None = keine Header
+                (separators.add_file_headers: false)
+            base_dir: Bezugsverzeichnis für relpath (Standard: aktuelles Verzeichnis)
+
+        Raises:
+            ValueError: Bei unbekannten Feldern oder ungültigen Formaten
+        """
+        self.format = header_format
+        self.base_dir = base_dir
+        self.fields = frozenset()
+        if header_format is None:
+            self.render: _Getter = lambda entry, filepath, number: b''
+            self.block: _Getter = self.render
+            self._estimate: _Getter = self.render
+            return
+
+        parts = _parse(header_format, 'separators.header_format')
+        self.fields = frozenset(field for _, field, _ in parts if field is not None)
+        unknown = sorted(self.fields.difference(HEADER_FIELDS))
+        if unknown:
+            raise ValueError(f"Unbekannte Felder in separators.header_format: "
+                             f"{', '.join('{' + field + '}' for field in unknown)} "
+                             f"(erlaubt: {', '.join(HEADER_FIELDS)})")
+
+        pieces: List[Union[bytes, _Getter]] = []
+        estimate_pieces: List[Union[bytes, _Getter]] = []
+        for literal, field, spec in parts:
+            if literal:
+                pieces.append(literal.encode('utf-8'))
+                estimate_pieces.append(pieces[-1])
+            if field is not None:
+                getter = self._getter(field, spec)
+                pieces.append(getter)
+                estimate_pieces.append(self._hash_placeholder(spec) if field == 'hash' else getter)
+        pieces.append(b'\n')
+        estimate_pieces.append(b'\n')
+
+        # Header-Zeile; block zusätzlich mit der Leerzeile vor dem Inhalt
+        self.render = self._compile(pieces)
+        self.block = self._compile(pieces + [b'\n'])
+        self._estimate = self._compile(estimate_pieces)
+
+    @property
+    def positional(self) -> bool:
+        """Ob der Header von der Position der Datei abhängt (Feld index)."""
+        return 'index' in self.fields
+
+    def size_bound(self, entry: Union[str, FileRecord], filepath: str, number: int) -> int:
+        """Länge des Headers, ohne die Datei zu lesen (hash wird mit voller Länge angesetzt)."""
+        return len(self._estimate(entry, filepath, number))
+
+    @staticmethod
+    def _compile(pieces: List[Union[bytes, _Getter]]) -> _Getter:
+        """Übersetzt die Teile in eine Funktion (Eintrag, Pfad, Position) → Header-Zeile."""
+        # Benachbarte Texte zusammenfassen
+        merged: List[Union[bytes, _Getter]] = []
+        for piece in pieces:
+            if isinstance(piece, bytes) and merged and isinstance(merged[-1], bytes):
+                merged[-1] += piece
+            else:
+                merged.append(piece)
+
+        getters = [piece for piece in merged if not isinstance(piece, bytes)]
+        if not getters:
+            line = b''.join(merged)
+            return lambda entry, filepath, number: line
+        if len(merged) == 3 and len(getters) == 1 and merged[1] is getters[0]:
+            prefix, getter, suffix = merged
+            if getter is _filepath:
+                # Standard-Header: ein Aufruf pro Datei
+                return lambda entry, filepath, number: prefix + filepath.encode('utf-8') + suffix
+            return lambda entry, filepath, number: prefix + getter(entry, filepath, number) + suffix
+
+        def render(entry, filepath: str, number: int) -> bytes:
+            return b''.join([piece if isinstance(piece, bytes) else piece(entry, filepath, number)
+                             for piece in merged])
+        return render
+
+    def _getter(self, field: str, spec: str) -> _Getter:
+        """Funktion für ein Feld; prüft das Format vorab an einem Beispielwert."""
+        if field == 'mtime':
+            if spec:
+                time.strftime(spec, time.localtime(0))
+                return lambda entry, filepath, number: time.strftime(
+                    spec, time.localtime(file_record(entry).mtime_ns // 1_000_000_000)).encode('utf-8')
+            formatter = TimestampFormatter()
+            return lambda entry, filepath, number: formatter(file_record(entry).mtime_ns)
+
+        if field in ('size', 'index'):
+            self._check_spec(spec, 0)
+            if field == 'size':
+                return lambda entry, filepath, number: format(file_record(entry).size, spec).encode('ascii')
+            return lambda entry, filepath, number: format(number, spec).encode('ascii')
+
+        self._check_spec(spec, '')
+        if field == 'hash':
+            return lambda entry, filepath, number: format(hash_file(filepath) or '', spec).encode('ascii')
+        if field == 'filepath' and not spec:
+            return _filepath
+        if field == 'basename':
+            value = lambda filepath: filepath.rpartition(os.sep)[2]
+        elif field == 'relpath':
+            value = self._relpath()
+        else:
+            value = lambda filepath: filepath
+        if spec:
+            return lambda entry, filepath, number: format(value(filepath), spec).encode('utf-8')
+        return lambda entry, filepath, number: value(filepath).encode('utf-8')
+
+    def _relpath(self) -> Callable[[str], str]:
+        """relpath: Pfade unterhalb von base_dir per Abschneiden, alle anderen mit os.path.relpath."""
+        base = self.base_dir or os.curdir
+        # Unnormalisiert wie bei der Suche (os.path.join(directory, name)), z. B. './docs/'
+        prefix = os.path.join(base, '')
+
+        def relpath(filepath: str) -> str:
+            if filepath.startswith(prefix) and len(filepath) > len(prefix):
+                rest = filepath[len(prefix):]
+                # '.', '..' oder doppelte Trenner im Rest löst erst os.path.relpath auf
+                if not _UNNORMALIZED.intersection(rest.split(os.sep)):
+                    return rest
+            return os.path.relpath(filepath, base)
+        return relpath
+
+    @staticmethod
+    def _hash_placeholder(spec: str) -> _Getter:
+        placeholder = format('0' * HASH_LENGTH, spec).encode('ascii')
+        return lambda entry, filepath, number: placeholder
+
+    @staticmethod
+    def _check_spec(spec: str, sample):
+        try:
+            format(sample, spec)
+        except ValueError as e:
+            raise ValueError(f"Ungültiges Format in separators.header_format: {spec!r} ({e})") from None
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Zeitstempel (output.add_timestamps) für MD-Merger
+"""
+
+import time
+from typing import Dict, Union
+
+# Zeitstempel pro Datei (nach dem Header), pro Dokument (ganz oben) oder beides
+TIMESTAMP_MODES = ('off', 'file', 'document', 'both')
+
+# Höchstzahl zwischengespeicherter Minuten, bevor der Zwischenspeicher geleert wird
+MAX_CACHED_MINUTES = 65536
+
+FILE_TIMESTAMP_PREFIX = '<!-- Geändert: '.encode('utf-8')
+DOCUMENT_TIMESTAMP_PREFIX = b'<!-- Stand: '
+_SUFFIX = b' -->\n'
+
+# Länge von 'JJJJ-MM-TT HH:MM:SS'
+TIMESTAMP_LENGTH = 19
+
+# Bytes, die ein Zeitstempel pro Datei zum Header hinzufügt
+FILE_TIMESTAMP_SIZE = len(FILE_TIMESTAMP_PREFIX) + TIMESTAMP_LENGTH + len(_SUFFIX)
+
+# Bytes des Zeitstempels pro Dokument samt folgender Leerzeile
+DOCUMENT_TIMESTAMP_SIZE = len(DOCUMENT_TIMESTAMP_PREFIX) + TIMESTAMP_LENGTH + len(_SUFFIX) + 1
+
+
+def timestamp_mode(value: Union[bool, str, None]) -> str:
+    """
+    Übersetzt output.add_timestamps in einen der TIMESTAMP_MODES.
+
+    Args:
+        value: false/true aus der Konfiguration (true = pro Datei) oder ein Modus
+
+    Raises:
+        ValueError: Bei einem unbekannten Wert
+    """
+    if value is None or value is False:
+        return 'off'
+    if value is True:
+        return 'file'
+    if value in TIMESTAMP_MODES:
+        return value
+    raise ValueError(f"Ungültiges output.add_timestamps: {value!r} "
+                     f"(erlaubt: true, false, {', '.join(TIMESTAMP_MODES)})")
+
+
+class TimestampFormatter:
+    """
+    Formatiert mtime_ns als lokale Zeit 'JJJJ-MM-TT HH:MM:SS' zwischen festen Bytes.
+
+    localtime und strftime laufen nur einmal pro Minute; zwischengespeichert
+    wird prefix + 'JJJJ-MM-TT HH:MM:', die Sekunden samt suffix kommen aus
+    einer Tabelle. Umstellungen der Zeitzone liegen immer auf einer
+    Minutengrenze, der Zwischenspeicher ist also exakt. Dateien eines Baums
+    teilen sich meist wenige Minuten (Checkout, Build), sodass pro Datei nur
+    eine Division, ein dict-Zugriff und eine Verkettung anfallen.
+    """
+
+    def __init__(self, prefix: bytes = b'', suffix: bytes = b''):
+        """
+        Args:
+            prefix: Bytes vor dem Zeitstempel
+            suffix: Bytes nach dem Zeitstempel
+        """
+        self._prefix = prefix
+        self._seconds = [f"{second:02d}".encode('ascii') + suffix for second in range(60)]
+        self._minutes: Dict[int, bytes] = {}
+
+    def __call__(self, mtime_ns: int) -> bytes:
+        minute, second = divmod(mtime_ns // 1_000_000_000, 60)
+        head = self._minutes.get(minute)
+        if head is None:
+            if len(self._minutes) >= MAX_CACHED_MINUTES:
+                self._minutes.clear()
+            head = self._prefix + time.strftime('%Y-%m-%d %H:%M:', time.localtime(minute * 60)).encode('ascii')
+            self._minutes[minute] = head
+        return head + self._seconds[second]
+
+
+class Timestamps:
+    """Erzeugt die Zeitstempel-Zeilen eines Modus aus den mtimes der Suche."""
+
+    def __init__(self, mode: str):
+        """
+        Args:
+            mode: Einer der TIMESTAMP_MODES
+        """
+        self.mode = mode
+        self.per_file = mode in ('file', 'both')
+        self.per_document = mode in ('document', 'both')
+        # mtime_ns → Zeile mit '\n' als Zeilenende
+        self.file_line = TimestampFormatter(FILE_TIMESTAMP_PREFIX, _SUFFIX)
+        # Für die jüngste Quelldatei, ganz oben im Dokument
+        self.document_line = TimestampFormatter(DOCUMENT_TIMESTAMP_PREFIX, _SUFFIX)
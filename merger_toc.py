@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Inhaltsverzeichnis (output.add_toc) für MD-Merger
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from merger_hashset import Hash64Set
+from merger_transform import heading_lines
+
+TOC_TITLE = 'Inhaltsverzeichnis'
+
+DEFAULT_TOC_WORKERS = min(16, (os.cpu_count() or 1) + 4)
+
+# Blockgröße beim Durchsuchen (in Zeichen)
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+# Zeichen, die GitHub beim Bilden der Anker entfernt
+_ANCHOR_STRIP = re.compile(r'[^\w\- ]')
+
+
+class Heading(NamedTuple):
+    """Eine Überschrift aus einer Quelldatei."""
+    level: int
+    text: str
+    # Vollständige Zeile, wie sie remove_duplicate_headers vergleicht
+    line: str
+
+
+def _parse_heading(line: str) -> Heading:
+    level = len(line) - len(line.lstrip('#'))
+    text = line[level:].strip()
+    # Schließende '#'-Folge gehört nicht zum Text
+    closing = text.rstrip('#')
+    if closing != text and (not closing or closing[-1] in ' \t'):
+        text = closing.rstrip()
+    return Heading(level, text, line)
+
+
+def _read_chunks(filepath: str, newline: Optional[str], max_bytes: Optional[int]) -> Iterator[str]:
+    if max_bytes is not None:
+        # Wie beim Kürzen: nur vollständige Zeilen innerhalb des Limits
+        with open(filepath, 'rb') as file:
+            data = file.read(max_bytes)
+        cut = data.rfind(b'\n') + 1
+        yield data[:cut].decode('utf-8') if cut else data.decode('utf-8', errors='ignore')
+        return
+
+    with open(filepath, 'r', encoding='utf-8', newline=newline) as file:
+        while True:
+            chunk = file.read(SCAN_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def scan_headings(filepath: str, newline: Optional[str] = None,
+                  max_bytes: Optional[int] = None) -> List[Heading]:
+    """
+    Sammelt die Überschriften einer Datei außerhalb von Code-Zäunen.
+
+    Die Datei wird stückweise gelesen; gehalten werden nur die Überschriften.
+
+    Args:
+        filepath: Pfad zur Markdown-Datei
+        newline: newline-Argument für open() (siehe TransformOptions.newline)
+        max_bytes: Nur die ersten max_bytes berücksichtigen (gekürzte Dateien)
+
+    Returns:
+        Überschriften in Dateireihenfolge; leer, wenn die Datei nicht lesbar ist
+    """
+    try:
+        return [_parse_heading(line) for line in heading_lines(_read_chunks(filepath, newline, max_bytes))]
+    except (OSError, UnicodeDecodeError):
+        # Wird beim Zusammenfügen ebenfalls übersprungen und dort gemeldet
+        return []
+
+
+def collect_headings(jobs: Iterable[Tuple[str, Optional[int]]], newline: Optional[str] = None,
+                     workers: int = DEFAULT_TOC_WORKERS) -> Iterator[List[Heading]]:
+    """
+    Durchsucht die Dateien parallel und liefert ihre Überschriften in Eingabereihenfolge.
+
+    Es sind höchstens 4 × workers Dateien gleichzeitig in Arbeit, sodass
+    der Speicherbedarf nicht mit der Anzahl der Dateien wächst.
+
+    Args:
+        jobs: Je Datei (Pfad, max_bytes oder None)
+        newline: newline-Argument für open()
+        workers: Anzahl der Threads
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='md-toc') as pool:
+        for filepath, max_bytes in jobs:
+            if len(pending) >= 4 * max(1, workers):
+                yield pending.popleft().result()
+            pending.append(pool.submit(scan_headings, filepath, newline, max_bytes))
+        while pending:
+            yield pending.popleft().result()
+
+
+def _escape_link_text(text: str) -> str:
+    return text.replace('[', '\\[').replace(']', '\\]')
+
+
+class AnchorNames:
+    """Vergibt Anker wie GitHub: klein geschrieben, Satzzeichen entfernt, Wiederholungen mit -1, -2 …"""
+
+    def __init__(self):
+        self._counts = {}
+
+    def add(self, text: str) -> str:
+        """Anker für die nächste Überschrift mit diesem Text."""
+        base = _ANCHOR_STRIP.sub('', text.lower()).replace(' ', '-')
+        count = self._counts.get(base)
+        if count is None:
+            self._counts[base] = 0
+            return base
+        count += 1
+        self._counts[base] = count
+        return f"{base}-{count}"
+
+
+def render_toc(headings: Iterable[List[Heading]], remove_duplicates: bool = False,
+               verify: bool = False) -> Tuple[str, int]:
+    """
+    Erzeugt das Inhaltsverzeichnis als Markdown-Liste.
+
+    Args:
+        headings: Je Datei die Liste ihrer Überschriften, in Ausgabereihenfolge
+        remove_duplicates: Überschriften wie processing.remove_duplicate_headers
+            nur beim ersten Vorkommen aufnehmen
+        verify: Gleiche Hashes Zeichen für Zeichen vergleichen (siehe Hash64Set)
+
+    Returns:
+        (Inhaltsverzeichnis mit '\\n' als Zeilenende, Anzahl der Einträge)
+    """
+    anchors = AnchorNames()
+    anchors.add(TOC_TITLE)
+    seen = Hash64Set(verify=verify)
+    entries = []
+    min_level = 6
+
+    for file_headings in headings:
+        for heading in file_headings:
+            if remove_duplicates and not seen.add(heading.line):
+                continue
+            entries.append((heading.level, heading.text, anchors.add(heading.text)))
+            min_level = min(min_level, heading.level)
+
+    lines = [f"## {TOC_TITLE}", ""]
+    lines.extend(f"{'  ' * (level - min_level)}- [{_escape_link_text(text)}](#{anchor})"
+                 for level, text, anchor in entries)
+    return '\n'.join(lines) + '\n', len(entries)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Zeilenweise Umwandlung der Dateiinhalte für MD-Merger
+"""
+
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from merger_hashset import Hash64Set
+
+# Zulässige Werte für output.line_ending
+LINE_ENDINGS = ('\n', '\r\n', '\r')
+
+# Zeilen, die Überschrift oder Code-Zaun sein können; alle anderen werden als Ganzes kopiert.
+# Mit dem vorangehenden '\n' als festem Präfix sucht re deutlich schneller als mit '^'.
+_SIGNIFICANT_LINE = re.compile(r'\n {0,3}(?:#|```|~~~)[^\n]*')
+_SIGNIFICANT_FIRST_LINE = re.compile(r' {0,3}(?:#|```|~~~)[^\n]*')
+
+
+class TransformOptions(NamedTuple):
+    """Einstellungen aus processing.* und output.line_ending, die den Inhalt verändern."""
+    normalize_line_endings: bool = True
+    line_ending: str = '\n'
+    remove_duplicate_headers: bool = False
+    skip_empty_files: bool = True
+    # Gleiche Hashes der Überschriften zusätzlich Zeichen für Zeichen vergleichen
+    verify_duplicate_headers: bool = False
+
+    @classmethod
+    def from_config(cls, config) -> 'TransformOptions':
+        """
+        Liest die Einstellungen aus einer MergerConfig.
+
+        Raises:
+            ValueError: Bei einem unbekannten output.line_ending
+        """
+        options = cls(
+            normalize_line_endings=bool(config.get('processing.normalize_line_endings', True)),
+            line_ending=config.get('output.line_ending', '\n'),
+            remove_duplicate_headers=bool(config.get('processing.remove_duplicate_headers', False)),
+            skip_empty_files=bool(config.get('processing.skip_empty_files', True)),
+            verify_duplicate_headers=bool(config.get('processing.verify_duplicate_headers', False)),
+        )
+        if options.line_ending not in LINE_ENDINGS:
+            raise ValueError(f"Ungültiges output.line_ending: {options.line_ending!r} "
+                             f"(erlaubt: \\n, \\r\\n, \\r)")
+        return options
+
+    @property
+    def identity(self) -> bool:
+        """Ob die Inhalte unverändert (bis auf vereinheitlichte Zeilenenden) übernommen werden."""
+        return (self.normalize_line_endings and self.line_ending == '\n'
+                and not self.remove_duplicate_headers and self.skip_empty_files)
+
+    @property
+    def newline(self) -> Optional[str]:
+        """newline-Argument für open(): None vereinheitlicht beim Lesen, '' lässt unverändert."""
+        return None if self.normalize_line_endings else ''
+
+
+def _fence_marker(stripped: str) -> Optional[tuple]:
+    """(Zeichen, Länge) eines öffnenden oder schließenden Code-Zauns, sonst None."""
+    char = stripped[:1]
+    if char not in ('`', '~'):
+        return None
+    length = len(stripped) - len(stripped.lstrip(char))
+    return (char, length) if length >= 3 else None
+
+
+def _is_heading(stripped: str) -> bool:
+    """ATX-Überschrift: 1 bis 6 '#', danach Leerraum oder Zeilenende."""
+    level = len(stripped) - len(stripped.lstrip('#'))
+    return 1 <= level <= 6 and stripped[level:level + 1] in ('', ' ', '\t', '\r')
+
+
+def _classify(line: str, fence: Optional[tuple]) -> Tuple[Optional[tuple], Optional[str]]:
+    """
+    Ordnet eine Zeile (ohne Zeilenumbruch) ein.
+
+    Args:
+        line: Die Zeile
+        fence: Offener Code-Zaun (Zeichen, Länge) oder None
+
+    Returns:
+        Neuer Zaun-Zustand und die Überschrift ohne Einrückung und
+        abschließenden Leerraum, falls die Zeile eine ist (sonst None)
+    """
+    stripped = line.lstrip(' ')
+    if len(line) - len(stripped) > 3:
+        # Eingerückter Code
+        return fence, None
+
+    marker = _fence_marker(stripped)
+    if marker is not None:
+        if fence is None:
+            return marker, None
+        if marker[0] == fence[0] and marker[1] >= fence[1] and not stripped[marker[1]:].strip():
+            return None, None
+        return fence, None
+
+    if fence is not None or not _is_heading(stripped):
+        return fence, None
+    return fence, stripped.rstrip()
+
+
+def _candidate_lines(text: str, end: int) -> Iterator[Tuple[int, int]]:
+    """(Beginn, Ende) aller Zeilen in text[:end], die Überschrift oder Code-Zaun sein können."""
+    first = _SIGNIFICANT_FIRST_LINE.match(text, 0, end)
+    if first is not None:
+        yield 0, first.end()
+    for match in _SIGNIFICANT_LINE.finditer(text, 0, end):
+        yield match.start() + 1, match.end()
+
+
+def heading_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Liefert alle ATX-Überschriften außerhalb von Code-Zäunen.
+
+    Args:
+        chunks: Dateiinhalt in beliebig geteilten Blöcken
+
+    Returns:
+        Überschriften-Zeilen ohne Einrückung und abschließenden Leerraum
+    """
+    fence = None
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        cut = text.rfind('\n') + 1
+        carry = text[cut:]
+        for start, end in _candidate_lines(text, cut):
+            fence, heading = _classify(text[start:end], fence)
+            if heading is not None:
+                yield heading
+
+    if carry:
+        _, heading = _classify(carry, fence)
+        if heading is not None:
+            yield heading
+
+
+class LineTransform:
+    """
+    Wendet alle aktivierten Umwandlungen in einem Durchgang an.
+
+    Die Einstellungen werden einmal zu einer einzigen feed-Funktion
+    übersetzt: ohne Überschriften-Filter genügt ein str.replace pro Block
+    (oder gar nichts), mit Filter läuft eine Zeilen-Zustandsmaschine, die
+    Code-Zäune verfolgt und beim Zusammensetzen gleich die Zeilenenden
+    umschreibt. Vereinheitlicht werden die Zeilenenden bereits beim Lesen
+    im Textmodus (TransformOptions.newline).
+
+    Eine Instanz gehört zu genau einer Ausgabedatei: die bereits gesehenen
+    Überschriften gelten über alle Dateien hinweg. Sie werden nur als
+    64-Bit-Hashes gehalten (Hash64Set), damit der Speicher auch bei
+    Millionen Überschriften klein bleibt.
+    """
+
+    def __init__(self, options: TransformOptions):
+        self.options = options
+        self._translate = options.normalize_line_endings and options.line_ending != '\n'
+        self._eol = options.line_ending if options.normalize_line_endings else '\n'
+        self._seen = Hash64Set(verify=options.verify_duplicate_headers)
+        self._fence: Optional[tuple] = None
+        self._carry = ''
+
+        if options.remove_duplicate_headers:
+            self.feed: Callable[[str], str] = self._feed_lines
+        elif self._translate:
+            eol = self._eol
+            self.feed = lambda text: text.replace('\n', eol)
+        else:
+            self.feed = lambda text: text
+
+    @property
+    def line_ending(self) -> bytes:
+        """Zeilenende für erzeugte Zeilen (Header, Trenner, fehlender Zeilenumbruch)."""
+        return self.options.line_ending.encode('ascii')
+
+    def begin(self):
+        """Beginnt eine neue Datei (Code-Zäune enden am Dateiende)."""
+        self._fence = None
+        self._carry = ''
+
+    def end(self) -> str:
+        """Gibt den Rest der Datei zurück (letzte Zeile ohne Zeilenumbruch)."""
+        carry, self._carry = self._carry, ''
+        if carry and self._keep(carry):
+            return carry
+        return ''
+
+    def apply(self, text: str) -> str:
+        """Wandelt den vollständigen Inhalt einer Datei um."""
+        self.begin()
+        return self.feed(text) + self.end()
+
+    def _feed_lines(self, text: str) -> str:
+        text = self._carry + text
+        cut = text.rfind('\n') + 1
+        self._carry = text[cut:]
+
+        # Nur Kandidaten-Zeilen laufen durch die Zustandsmaschine, der Rest wird in Stücken kopiert
+        pieces = []
+        start = 0
+        for line_start, line_end in _candidate_lines(text, cut):
+            if not self._keep(text[line_start:line_end]):
+                # Zeile samt Zeilenumbruch entfernen
+                pieces.append(text[start:line_start])
+                start = line_end + 1
+
+        if pieces:
+            pieces.append(text[start:cut])
+            text = ''.join(pieces)
+        else:
+            text = text[:cut]
+        return text.replace('\n', self._eol) if self._translate else text
+
+    def _keep(self, line: str) -> bool:
+        self._fence, key = _classify(line, self._fence)
+        return key is None or self._seen.add(key)
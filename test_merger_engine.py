@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Regressionstests für die UTF-8-Prüfung beim Kopieren und Vorlesen
+
+Aufruf: python -m unittest test_merger_engine
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from markdown_merger_c_l_i import MergeStats, max_file_size_mb_option, merge_markdown_files, merge_sharded
+from merger_dedup import find_duplicates
+from merger_discovery import stat_input_files
+from merger_engine import COPY_CHUNK_SIZE, scan_plain_utf8
+from merger_transform import TransformOptions
+
+# Block endet mit angefangener Mehrbyte-Folge, dann ein ganzer ASCII-Block, dann das Folgebyte von 'é'
+SPLIT_SEQUENCE = b'#' * (COPY_CHUNK_SIZE - 1) + b'\xc3' + b'a' * COPY_CHUNK_SIZE + b'\xa9 Ende\n'
+
+
+class WorkdirTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='md-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.workdir, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def _merge(self, records, variants) -> list:
+        outputs = []
+        for number, options in enumerate(variants):
+            output_file = os.path.join(self.workdir, f'out-{number}.md')
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                self.assertTrue(merge_markdown_files(records, output_file, **options))
+            with open(output_file, 'rb') as file:
+                outputs.append(file.read())
+        return outputs
+
+
+class ScanPlainUtf8Test(WorkdirTest):
+
+    def _scan(self, data: bytes, chunk_size: int):
+        fd = os.open(self._write('scan.md', data), os.O_RDONLY)
+        try:
+            return scan_plain_utf8(fd, len(data), chunk_size)
+        finally:
+            os.close(fd)
+
+    def test_ascii_block_after_unfinished_sequence_is_rejected(self):
+        self.assertIsNone(self._scan(b'ab\xc3' + b'a' * 15 + b'\xa9\n', chunk_size=3))
+
+    def test_sequence_split_across_blocks_is_accepted(self):
+        self.assertEqual(self._scan(b'ab\xc3\xa9cd\n', chunk_size=3), b'\n')
+
+    def test_zero_copy_matches_decoding_path(self):
+        records = stat_input_files([self._write('a.md', '# Gültig: é\n'.encode('utf-8')),
+                                    self._write('b.md', SPLIT_SEQUENCE),
+                                    self._write('c.md', b'# Ende\n')])
+        outputs = self._merge(records, [{'zero_copy': False}, {'zero_copy': True},
+                                        {'zero_copy': True, 'parallel_writers': 2}])
+
+        self.assertNotIn(b'b.md', outputs[0])
+        for output in outputs[1:]:
+            self.assertEqual(output, outputs[0])
+
+
+class KeepEmptyTest(WorkdirTest):
+
+    def test_unreadable_file_is_not_kept_as_empty(self):
+        records = stat_input_files([self._write('a.md', b'# A\n'),
+                                    self._write('bad.md', b'\xff\xfe kaputt\n'),
+                                    self._write('empty.md', b''),
+                                    self._write('z.md', b'# Z\n')])
+        keep_empty = TransformOptions(skip_empty_files=False)
+        outputs = self._merge(records, [
+            {'transform': keep_empty},
+            {'transform': keep_empty, 'read_ahead': 4},
+            {'transform': keep_empty, 'max_file_size': 3, 'oversize_policy': 'truncate'},
+        ])
+
+        self.assertNotIn(b'bad.md', outputs[0])
+        self.assertIn(b'empty.md', outputs[0])
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertNotIn(b'bad.md', outputs[2])
+        self.assertIn(b'empty.md', outputs[2])
+
+
+
+class ShardLimitTest(WorkdirTest):
+
+    def test_reference_lines_stay_within_shard_limit(self):
+        # Inhalt kürzer als der Verweis auf den langen Pfad des ersten Vorkommens
+        first = self._write('a-' + 'x' * 60 + '.md', b'# D\n')
+        records = stat_input_files([first] + [self._write(f'dup-{number}.md', b'# D\n') for number in range(8)])
+        duplicates = find_duplicates(records, workers=1)
+        self.assertEqual(len(duplicates), 8)
+
+        output_file = os.path.join(self.workdir, 'out.md')
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            self.assertTrue(merge_sharded(records, output_file, max_output_size=200, duplicates=duplicates))
+
+        shards = [name for name in os.listdir(self.workdir) if name.startswith('out.0')]
+        self.assertGreater(len(shards), 1)
+        for name in shards:
+            self.assertLessEqual(os.path.getsize(os.path.join(self.workdir, name)), 200, name)
+
+
+
+class SegmentIndexTest(WorkdirTest):
+
+    def _merge_indexed(self, paths, output_file: str) -> MergeStats:
+        stats = MergeStats()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            self.assertTrue(merge_markdown_files(stat_input_files(paths), output_file, stats=stats,
+                                                 index_file=output_file + '.index.json'))
+        return stats
+
+    def _read(self, path: str) -> bytes:
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def test_racy_edit_with_same_size_and_mtime_is_not_reused(self):
+        paths = [self._write('a.md', b'# Alt\n'), self._write('b.md', b'# B\n')]
+        output_file = os.path.join(self.workdir, 'out.md')
+        self._merge_indexed(paths, output_file)
+
+        # Gleich große Änderung innerhalb der Zeitstempel-Granularität: mtime bleibt gleich
+        mtime_ns = os.stat(paths[0]).st_mtime_ns
+        self._write('a.md', b'# Neu\n')
+        os.utime(paths[0], ns=(mtime_ns, mtime_ns))
+        stats = self._merge_indexed(paths, output_file)
+
+        self.assertEqual(stats.files_reused, 0)
+        self.assertIn(b'# Neu', self._read(output_file))
+        self.assertEqual(self._read(output_file), self._merge(stat_input_files(paths), [{}])[0])
+
+    def test_old_sources_are_reused(self):
+        paths = [self._write('a.md', b'# A\n'), self._write('b.md', b'# B\n')]
+        past_ns = time.time_ns() - 3600 * 1_000_000_000
+        for path in paths:
+            os.utime(path, ns=(past_ns, past_ns))
+        output_file = os.path.join(self.workdir, 'out.md')
+        self._merge_indexed(paths, output_file)
+
+        self.assertEqual(self._merge_indexed(paths, output_file).files_reused, 2)
+
+
+class MaxFileSizeOptionTest(unittest.TestCase):
+
+    def test_quoted_config_value_is_converted(self):
+        self.assertEqual(max_file_size_mb_option(None, '10'), 10.0)
+        self.assertEqual(max_file_size_mb_option(None, 0.5), 0.5)
+
+    def test_invalid_config_values_are_rejected(self):
+        for value in ('zehn', 0, -1, '-2', True, [10], 'inf', 'nan'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                max_file_size_mb_option(None, value)
+
+    def test_command_line_overrides_config(self):
+        self.assertIsNone(max_file_size_mb_option(None, None))
+        self.assertIsNone(max_file_size_mb_option(0, 10))
+        self.assertEqual(max_file_size_mb_option(2, 'zehn'), 2)
+        with self.assertRaises(ValueError):
+            max_file_size_mb_option(-1, None)
+
+
+if __name__ == '__main__':
+    unittest.main()